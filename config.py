@@ -0,0 +1,37 @@
+
+"""
+Process-wide environment configuration.
+The .env file is parsed once, on first use, and every module reads its
+settings through these helpers instead of calling load_dotenv itself.
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=1)
+def load_env() -> None:
+    """Load the .env file once per process; set variables take priority."""
+    load_dotenv(override=False)
+
+
+def get_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Get an environment setting, treating empty values as unset.
+
+    Args:
+        name: Environment variable name
+        default: Value returned when the variable is unset or empty
+
+    Returns:
+        The setting's value, or default
+    """
+    load_env()
+    return os.getenv(name) or default
+
+
+def get_env_flag(name: str) -> bool:
+    """Get a boolean setting; only "true" (any case) enables it."""
+    return (get_env(name) or "").lower() == "true"
@@ -5,11 +5,173 @@ Provides various methods to split text into manageable chunks while preserving
 context and handling token limits appropriately.
 """
 
-from typing import List, Optional
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
 import tiktoken
 from tiktoken.core import Encoding
 
 
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str) -> Encoding:
+    """Load the tokenizer for a model, reusing it across chunkers."""
+    return tiktoken.encoding_for_model(model_name)
+
+
+class _HFEncoding:
+    """
+    Adapts a HuggingFace `tokenizers.Tokenizer` to the subset of the
+    tiktoken Encoding API used by TextChunker.
+    
+    Batch calls run on the tokenizers Rayon pool, which is sized by the
+    RAYON_NUM_THREADS environment variable rather than num_threads.
+    """
+    
+    def __init__(self, tokenizer: Any):
+        self._tokenizer = tokenizer
+
+    def encode_ordinary(self, text: str) -> List[int]:
+        return self._tokenizer.encode(text, add_special_tokens=False).ids
+
+    def encode_ordinary_batch(
+        self,
+        texts: List[str],
+        num_threads: int = 8
+    ) -> List[List[int]]:
+        encodings = self._tokenizer.encode_batch(
+            texts,
+            add_special_tokens=False
+        )
+        return [encoding.ids for encoding in encodings]
+
+    def decode(self, tokens: List[int]) -> str:
+        return self._tokenizer.decode(tokens)
+
+    def decode_batch(
+        self,
+        batch: List[List[int]],
+        num_threads: int = 8
+    ) -> List[str]:
+        return self._tokenizer.decode_batch(batch)
+
+
+@lru_cache(maxsize=8)
+def _get_hf_encoding(model_name: str) -> _HFEncoding:
+    """Load a HuggingFace tokenizer, reusing it across chunkers."""
+    # Optional dependency; only needed for backend="hf"
+    from tokenizers import Tokenizer
+    return _HFEncoding(Tokenizer.from_pretrained(model_name))
+
+
+_BACKENDS = {
+    "tiktoken": _get_encoding,
+    "hf": _get_hf_encoding,
+}
+
+
+def _token_windows(
+    tokens: List[int],
+    max_tokens: int,
+    overlap: int = 0
+) -> List[List[int]]:
+    """
+    Split a token list into fixed-size windows advancing by a stride.
+    
+    Window boundaries are computed up front as arrays. Windows stop once
+    one reaches the end of the tokens; any later window would only repeat
+    the previous window's overlap.
+    """
+    n = len(tokens)
+    if not n:
+        return []
+    starts = np.arange(0, max(n - overlap, 1), max_tokens - overlap)
+    ends = np.minimum(starts + max_tokens, n)
+    return [
+        tokens[start:end]
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
+
+
+def _iter_blocks(source: Iterable[str], block_size: int) -> Iterator[str]:
+    """
+    Join consecutive pieces of text (e.g. file lines) into larger blocks.
+
+    Blocks end where a piece ends, so a line is never split between two
+    blocks, and each block is at least block_size characters long except
+    the last.
+    """
+    pieces: List[str] = []
+    size = 0
+    for piece in source:
+        pieces.append(piece)
+        size += len(piece)
+        if size >= block_size:
+            yield "".join(pieces)
+            pieces = []
+            size = 0
+    if pieces:
+        yield "".join(pieces)
+
+
+def _iter_mapped_blocks(mapped: mmap.mmap, block_size: int) -> Iterator[str]:
+    """Decode a mapped UTF-8 file in blocks that end after a newline."""
+    size = len(mapped)
+    start = 0
+    with memoryview(mapped) as view:
+        while start < size:
+            newline = mapped.find(b"\n", min(start + block_size, size) - 1)
+            end = size if newline == -1 else newline + 1
+            # Newlines never fall inside a multi-byte UTF-8 sequence
+            block = str(view[start:end], "utf-8")
+            if "\r" in block:
+                # Match text-mode universal newlines
+                block = block.replace("\r\n", "\n").replace("\r", "\n")
+            yield block
+            start = end
+
+
+@contextmanager
+def open_text_blocks(
+    file_path: str | Path,
+    block_size: int = 1 << 20
+) -> Iterator[Iterator[str]]:
+    """
+    Memory-map a UTF-8 text file and read it as decoded blocks.
+
+    The file is paged in by the OS as blocks are decoded, so it is never
+    read into memory whole and is not split into per-line strings. Each
+    block is at least block_size bytes long, except the last, and ends
+    after a newline. Pass the blocks to TextChunker.iter_chunk_with_overlap.
+
+    Args:
+        file_path: Path to the text file
+        block_size: Minimum bytes decoded per block
+
+    Yields:
+        Iterator[str]: The file's text, block by block
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped
+            yield iter(())
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            blocks = _iter_mapped_blocks(mapped, block_size)
+            try:
+                yield blocks
+            finally:
+                # Release the memoryview before the mapping is closed
+                blocks.close()
+
+
 class ChunkerError(Exception):
     """Custom exception for text chunking operations."""
     pass
@@ -22,19 +184,29 @@ class TextChunker:
     MAX_GPT35_TOKENS = 4096
     MAX_AZURE_EMBED_TOKENS = 8192
     
-    def __init__(self, model_name: str = "gpt-3.5-turbo"):
+    def __init__(
+        self,
+        model_name: str = "gpt-3.5-turbo",
+        backend: str = "tiktoken"
+    ):
         """
         Initialize the chunker with a specific model's tokenizer.
         
         Args:
-            model_name: Name of the model to use for tokenization
+            model_name: Name of the model to use for tokenization. With
+                the "hf" backend this is a HuggingFace Hub model id.
+            backend: Tokenizer backend, "tiktoken" or "hf" (requires the
+                optional `tokenizers` package)
             
         Raises:
             ChunkerError: If tokenizer initialization fails
         """
         try:
             self.model_name = model_name
-            self._tokenizer = tiktoken.encoding_for_model(model_name)
+            self.backend = backend
+            if backend not in _BACKENDS:
+                raise ValueError(f"Unknown tokenizer backend: {backend}")
+            self._tokenizer = _BACKENDS[backend](model_name)
         except Exception as e:
             raise ChunkerError(f"Failed to initialize tokenizer: {str(e)}")
 
@@ -59,6 +231,9 @@ class TextChunker:
         """
         Chunk text into segments by word boundaries.
         
+        Chunks are slices of the original text, so whitespace between
+        words inside a chunk is preserved as-is.
+        
         Args:
             text: Input text to chunk
             max_tokens: Maximum tokens per chunk
@@ -70,12 +245,24 @@ class TextChunker:
             ValueError: If max_tokens is invalid
         """
         self._validate_chunk_params(max_tokens)
+        if not text:
+            return []
         
-        words = text.split()
-        return [
-            ' '.join(words[i:i + max_tokens])
-            for i in range(0, len(words), max_tokens)
-        ]
+        # Single pass over word offsets; no per-word strings are built
+        chunks = []
+        count = 0
+        start = end = 0
+        for match in _WORD_PATTERN.finditer(text):
+            if count == 0:
+                start = match.start()
+            end = match.end()
+            count += 1
+            if count == max_tokens:
+                chunks.append(text[start:end])
+                count = 0
+        if count:
+            chunks.append(text[start:end])
+        return chunks
 
     def chunk_by_tokens(
         self,
@@ -97,17 +284,106 @@ class TextChunker:
             ChunkerError: If tokenization fails
         """
         self._validate_chunk_params(max_tokens)
+        if not text:
+            return []
+        
+        try:
+            tokens = self._tokenizer.encode_ordinary(text)
+            chunks = _token_windows(tokens, max_tokens)
+            return self._tokenizer.decode_batch(chunks)
+        except Exception as e:
+            raise ChunkerError(f"Failed to chunk text: {str(e)}")
+
+    def chunk_by_tokens_with_counts(
+        self,
+        text: str,
+        max_tokens: int = 1024,
+        overlap: int = 0
+    ) -> List[Tuple[str, int]]:
+        """
+        Chunk text by token count and return each chunk's token count.
+        
+        The counts come from the token windows already computed while
+        chunking, so callers do not need to re-encode chunks to size
+        embedding requests.
+        
+        Args:
+            text: Input text to chunk
+            max_tokens: Maximum tokens per chunk
+            overlap: Number of tokens to overlap between chunks
+            
+        Returns:
+            List of (chunk_text, token_count) pairs
+            
+        Raises:
+            ValueError: If max_tokens or overlap is invalid
+            ChunkerError: If tokenization fails
+        """
+        self._validate_chunk_params(max_tokens, overlap)
+        if not text:
+            return []
         
         try:
-            tokens = self._tokenizer.encode(text)
-            chunks = [
-                tokens[i:i + max_tokens]
-                for i in range(0, len(tokens), max_tokens)
+            tokens = self._tokenizer.encode_ordinary(text)
+            chunks = _token_windows(tokens, max_tokens, overlap)
+            decoded = self._tokenizer.decode_batch(chunks)
+            return [
+                (chunk_text, len(chunk))
+                for chunk_text, chunk in zip(decoded, chunks)
             ]
-            return [self._tokenizer.decode(chunk) for chunk in chunks]
         except Exception as e:
             raise ChunkerError(f"Failed to chunk text: {str(e)}")
 
+    def chunk_by_tokens_batch(
+        self,
+        texts: List[str],
+        max_tokens: int = 1024
+    ) -> List[List[str]]:
+        """
+        Chunk several texts into segments based on token count.
+
+        All texts are tokenized in a single parallel batch and all chunks
+        are decoded in a single batch, instead of one call per text.
+
+        Args:
+            texts: Input texts to chunk
+            max_tokens: Maximum tokens per chunk
+
+        Returns:
+            List of chunk lists, one per input text
+
+        Raises:
+            ValueError: If max_tokens is invalid
+            ChunkerError: If tokenization fails
+        """
+        self._validate_chunk_params(max_tokens)
+
+        try:
+            tokens_list = self._tokenizer.encode_ordinary_batch(
+                texts,
+                num_threads=os.cpu_count() or 1
+            )
+            all_chunks = []
+            chunk_counts = []
+            for tokens in tokens_list:
+                chunks = _token_windows(tokens, max_tokens)
+                all_chunks.extend(chunks)
+                chunk_counts.append(len(chunks))
+
+            decoded = self._tokenizer.decode_batch(
+                all_chunks,
+                num_threads=os.cpu_count() or 1
+            )
+
+            results = []
+            offset = 0
+            for count in chunk_counts:
+                results.append(decoded[offset:offset + count])
+                offset += count
+            return results
+        except Exception as e:
+            raise ChunkerError(f"Failed to chunk texts: {str(e)}")
+
     def chunk_with_overlap(
         self,
         text: str,
@@ -130,19 +406,79 @@ class TextChunker:
             ChunkerError: If tokenization fails
         """
         self._validate_chunk_params(max_tokens, overlap)
+        if not text:
+            return []
         
         try:
-            tokens = self._tokenizer.encode(text)
-            chunks = []
-            start = 0
-            
-            while start < len(tokens):
-                end = min(start + max_tokens, len(tokens))
-                chunk = tokens[start:end]
-                chunks.append(self._tokenizer.decode(chunk))
-                start += max_tokens - overlap
-                
-            return chunks
+            tokens = self._tokenizer.encode_ordinary(text)
+            chunks = _token_windows(tokens, max_tokens, overlap)
+            return self._tokenizer.decode_batch(chunks)
+        except Exception as e:
+            raise ChunkerError(f"Failed to chunk text with overlap: {str(e)}")
+
+    def iter_chunk_with_overlap(
+        self,
+        source: Iterable[str],
+        max_tokens: int = 1024,
+        overlap: int = 50,
+        block_size: int = 1 << 16
+    ) -> Iterator[str]:
+        """
+        Chunk streamed text into overlapping segments as it is read.
+
+        Yields the same windows as chunk_with_overlap without holding the
+        whole text or its tokens in memory; only the tokens of the current
+        block and one window are kept. Pass an open text file to chunk it
+        line by line. Text is tokenized a block of lines at a time, so
+        tokens can differ slightly from whole-text tokenization where a
+        token would span a block boundary.
+
+        Args:
+            source: Text pieces to chunk, such as the lines of a file
+            max_tokens: Maximum tokens per chunk
+            overlap: Number of tokens to overlap between chunks
+            block_size: Characters of text tokenized at a time
+
+        Returns:
+            Iterator of text chunks with overlap
+
+        Raises:
+            ValueError: If max_tokens or overlap is invalid
+            ChunkerError: If tokenization fails
+        """
+        self._validate_chunk_params(max_tokens, overlap)
+        return self._iter_windows(source, max_tokens, overlap, block_size)
+
+    def _iter_windows(
+        self,
+        source: Iterable[str],
+        max_tokens: int,
+        overlap: int,
+        block_size: int
+    ) -> Iterator[str]:
+        """Yield overlapping windows over the tokens of streamed text."""
+        step = max_tokens - overlap
+        buffer: List[int] = []
+        emitted = False
+        try:
+            for block in _iter_blocks(source, block_size):
+                buffer.extend(self._tokenizer.encode_ordinary(block))
+                # A window is final once more tokens follow it; the
+                # block's final windows are decoded in one batch
+                ready = []
+                start = 0
+                while len(buffer) - start > max_tokens:
+                    ready.append(buffer[start:start + max_tokens])
+                    start += step
+                del buffer[:start]
+                if ready:
+                    yield from self._tokenizer.decode_batch(ready)
+                    emitted = True
+
+            # The tail is a window unless the previous one already
+            # covered it as overlap
+            if len(buffer) > overlap or (buffer and not emitted):
+                yield self._tokenizer.decode(buffer)
         except Exception as e:
             raise ChunkerError(f"Failed to chunk text with overlap: {str(e)}")
 
@@ -165,6 +501,56 @@ class TextChunker:
             ChunkerError: If tokenization fails
         """
         try:
-            return len(self._tokenizer.encode(text))
+            return len(self._tokenizer.encode_ordinary(text))
         except Exception as e:
             raise ChunkerError(f"Failed to count tokens: {str(e)}")
+
+    def count_tokens_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Count the tokens in several texts with one parallel batch encode.
+        
+        Args:
+            texts: Input texts to count tokens for
+            
+        Returns:
+            Array of token counts, one per text
+            
+        Raises:
+            ChunkerError: If tokenization fails
+        """
+        try:
+            tokens_list = self._tokenizer.encode_ordinary_batch(
+                texts,
+                num_threads=os.cpu_count() or 1
+            )
+            return np.fromiter(
+                map(len, tokens_list),
+                dtype=np.int32,
+                count=len(tokens_list)
+            )
+        except Exception as e:
+            raise ChunkerError(f"Failed to count tokens: {str(e)}")
+
+    def is_within_token_limit(self, text: str, limit: int) -> bool:
+        """
+        Check whether a text fits in a token limit.
+        
+        Every token covers at least one UTF-8 byte, so texts whose byte
+        length is within the limit are accepted without being encoded.
+        
+        Args:
+            text: Input text to check
+            limit: Maximum number of tokens allowed
+            
+        Returns:
+            True if the text has at most limit tokens
+            
+        Raises:
+            ChunkerError: If tokenization fails
+        """
+        byte_length = (
+            len(text) if text.isascii() else len(text.encode('utf-8'))
+        )
+        if byte_length <= limit:
+            return True
+        return self.count_tokens(text) <= limit
@@ -4,12 +4,142 @@ Embeddings generation module using Azure OpenAI services.
 Handles the creation of vector embeddings for text chunks.
 """
 
-from typing import List, Optional
+from typing import (
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union
+)
+import asyncio
+import importlib.util
 import os
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from openai import AzureOpenAI
+from functools import lru_cache
+import numpy as np
+import httpx
+from openai import (
+    AsyncAzureOpenAI,
+    AzureOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient
+)
 from openai.types.create_embedding_response import CreateEmbeddingResponse
-from dotenv import load_dotenv
+
+from config import load_env
+from document_processor.embedding_cache import (
+    EmbeddingCache,
+    SQLiteEmbeddingCache
+)
+
+
+# Connection pool limits for the sync and async HTTP clients
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+
+@lru_cache(maxsize=1)
+def _get_http_client() -> httpx.Client:
+    """
+    Get the process-wide HTTP client shared by all Embedder instances.
+    
+    Keep-alive connections are pooled across embedders; HTTP/2 is used
+    when the optional `h2` package is installed.
+    """
+    return DefaultHttpxClient(
+        limits=HTTP_LIMITS,
+        http2=importlib.util.find_spec("h2") is not None
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_default_cache() -> EmbeddingCache:
+    """
+    Get the in-memory cache shared by Embedder instances without their own.
+
+    Entries are keyed by model and text hash rather than by embedder, so a
+    repeated query string is answered from memory even when each search
+    builds a new Embedder.
+    """
+    return EmbeddingCache(maxsize=4096)
+
+
+# Texts sent per embeddings request, within the service's input limit
+EMBED_BATCH_SIZE = 96
+# Embeddings requests in flight at once for the async methods
+EMBED_CONCURRENCY = 8
+
+
+# A chunk is either its text or a (text, token_count) pair
+ChunkInput = Union[str, Tuple[str, int]]
+
+
+def _split_token_counts(
+    chunks: Sequence[ChunkInput]
+) -> Tuple[List[str], Optional[List[int]]]:
+    """Separate chunk texts from their precomputed token counts, if any."""
+    if chunks and isinstance(chunks[0], tuple):
+        return [text for text, _ in chunks], [count for _, count in chunks]
+    return list(chunks), None
+
+
+def _unique_misses(
+    texts: List[str],
+    embeddings: List[Optional[List[float]]]
+) -> Tuple[List[int], Dict[int, int]]:
+    """
+    Find the chunks that still need embedding, without duplicates.
+    
+    Returns:
+        Indices of the first occurrence of each uncached text, and a
+        mapping from every repeated occurrence to that first index
+    """
+    first_seen: Dict[str, int] = {}
+    unique: List[int] = []
+    duplicates: Dict[int, int] = {}
+    for index, (text, embedding) in enumerate(zip(texts, embeddings)):
+        if embedding is not None:
+            continue
+        first = first_seen.setdefault(text, index)
+        if first == index:
+            unique.append(index)
+        else:
+            duplicates[index] = first
+    return unique, duplicates
+
+
+def _plan_batches(
+    indices: List[int],
+    token_counts: Optional[List[int]],
+    batch_size: int,
+    max_batch_tokens: Optional[int]
+) -> List[List[int]]:
+    """
+    Group chunk indices into request batches.
+    
+    A batch is closed when it holds batch_size chunks or, when token
+    counts are known, when the next chunk would exceed max_batch_tokens.
+    """
+    use_tokens = token_counts is not None and max_batch_tokens is not None
+    batches = []
+    current: List[int] = []
+    current_tokens = 0
+    for index in indices:
+        tokens = token_counts[index] if use_tokens else 0
+        if current and (
+            len(current) == batch_size
+            or (use_tokens and current_tokens + tokens > max_batch_tokens)
+        ):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
 
 
 @dataclass
@@ -24,7 +154,7 @@ class EmbeddingConfig:
     @classmethod
     def from_env(cls) -> 'EmbeddingConfig':
         """Create configuration from environment variables."""
-        load_dotenv()
+        load_env()
         
         required_vars = [
             "AZURE_OPENAI_ENDPOINT",
@@ -58,12 +188,22 @@ class EmbeddingError(Exception):
 class Embedder:
     """Handles text embedding operations using Azure OpenAI."""
     
-    def __init__(self, config: Optional[EmbeddingConfig] = None):
+    # Retries with backoff on 429/5xx are handled by the OpenAI client
+    MAX_RETRIES = 5
+    
+    def __init__(
+        self,
+        config: Optional[EmbeddingConfig] = None,
+        cache: Optional[Union[EmbeddingCache, SQLiteEmbeddingCache]] = None
+    ):
         """
         Initialize the embedder with configuration.
         
         Args:
             config: Optional embedding configuration. If None, loads from env.
+            cache: Optional embedding cache, e.g. a SQLiteEmbeddingCache
+                to keep vectors across runs. If None, the process-wide
+                in-memory LRU cache is used.
             
         Raises:
             ValueError: If configuration is invalid
@@ -71,26 +211,60 @@ class Embedder:
         """
         try:
             self.config = config or EmbeddingConfig.from_env()
+            self.cache = cache if cache is not None else _get_default_cache()
             self._client = AzureOpenAI(
                 azure_endpoint=self.config.endpoint,
                 azure_deployment=self.config.deployment,
                 api_version=self.config.api_version,
-                api_key=self.config.api_key
+                api_key=self.config.api_key,
+                max_retries=self.MAX_RETRIES,
+                http_client=_get_http_client()
             )
         except Exception as e:
             raise EmbeddingError(f"Failed to initialize embedder: {str(e)}")
 
+    def _create_async_client(self) -> AsyncAzureOpenAI:
+        """Create an async client bound to the current event loop."""
+        return AsyncAzureOpenAI(
+            azure_endpoint=self.config.endpoint,
+            azure_deployment=self.config.deployment,
+            api_version=self.config.api_version,
+            api_key=self.config.api_key,
+            max_retries=self.MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                limits=HTTP_LIMITS,
+                http2=importlib.util.find_spec("h2") is not None
+            )
+        )
+
+    @asynccontextmanager
+    async def async_client(self) -> AsyncIterator[AsyncAzureOpenAI]:
+        """
+        Open an async client for several aembed_chunks calls to share.
+
+        Async connections can't outlive their event loop, so unlike the
+        sync client this one is opened per run, not per process. Pass it
+        to each aembed_chunks call so they reuse its connections; it is
+        closed on exit.
+        """
+        async with self._create_async_client() as client:
+            yield client
+
     def embed_chunks(
         self,
-        chunks: List[str],
-        batch_size: int = 10
+        chunks: Sequence[ChunkInput],
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_batch_tokens: Optional[int] = None
     ) -> List[List[float]]:
         """
         Generate embeddings for a list of text chunks.
         
         Args:
-            chunks: List of text chunks to embed
-            batch_size: Number of chunks to process in parallel
+            chunks: List of text chunks to embed, or (text, token_count)
+                pairs as returned by TextChunker.chunk_by_tokens_with_counts
+            batch_size: Maximum number of chunks sent in each request
+            max_batch_tokens: Optional token budget per request; only
+                applied when chunks carry token counts
             
         Returns:
             List of embedding vectors
@@ -102,29 +276,42 @@ class Embedder:
             return []
 
         try:
-            embeddings = []
+            texts, token_counts = _split_token_counts(chunks)
+            model = self.config.dimensions
+            embeddings = self.cache.get_many(model, texts)
+            # Repeated texts in this call are embedded only once
+            missing, duplicates = _unique_misses(texts, embeddings)
+            batches = _plan_batches(
+                missing, token_counts, batch_size, max_batch_tokens
+            )
             
-            # Process chunks in batches
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                responses: List[CreateEmbeddingResponse] = [
+            # Process cache misses in batches
+            processed = 0
+            for batch_indices in batches:
+                batch = [texts[j] for j in batch_indices]
+                response: CreateEmbeddingResponse = (
                     self._client.embeddings.create(
-                        model=self.config.dimensions,
-                        input=chunk
+                        model=model,
+                        input=batch
                     )
-                    for chunk in batch
-                ]
+                )
                 
+                # One request per batch; restore input order by index
                 batch_embeddings = [
-                    response.data[0].embedding for response in responses
+                    data.embedding
+                    for data in sorted(response.data, key=lambda d: d.index)
                 ]
-                embeddings.extend(batch_embeddings)
+                for j, embedding in zip(batch_indices, batch_embeddings):
+                    embeddings[j] = embedding
+                self.cache.set_many(model, batch, batch_embeddings)
                 
                 # Log progress for long operations
-                if len(chunks) > batch_size:
-                    processed = min(i + batch_size, len(chunks))
-                    print(f"Processed {processed}/{len(chunks)} chunks")
+                processed += len(batch_indices)
+                if len(batches) > 1:
+                    print(f"Processed {processed}/{len(missing)} chunks")
             
+            for j, first in duplicates.items():
+                embeddings[j] = list(embeddings[first])
             return embeddings
 
         except Exception as e:
@@ -132,6 +319,145 @@ class Embedder:
                 f"Failed to generate embeddings: {str(e)}"
             )
 
+    def embed_chunks_array(
+        self,
+        chunks: List[str],
+        batch_size: int = EMBED_BATCH_SIZE,
+        dtype: np.dtype = np.float32
+    ) -> np.ndarray:
+        """
+        Generate embeddings as one contiguous (n_chunks, dimensions) array.
+        
+        Args:
+            chunks: List of text chunks to embed
+            batch_size: Number of chunks sent in each embeddings request
+            dtype: Element type of the array, e.g. np.float16 to halve
+                memory for large corpora
+            
+        Returns:
+            2-D array with one embedding per row
+            
+        Raises:
+            EmbeddingError: If embedding generation fails
+        """
+        embeddings = self.embed_chunks(chunks, batch_size=batch_size)
+        if not embeddings:
+            return np.empty((0, 0), dtype=dtype)
+        return np.asarray(embeddings, dtype=dtype)
+
+    async def aembed_chunks(
+        self,
+        chunks: Sequence[ChunkInput],
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        max_batch_tokens: Optional[int] = None,
+        client: Optional[AsyncAzureOpenAI] = None
+    ) -> List[List[float]]:
+        """
+        Generate embeddings with several batch requests in flight at once.
+        
+        Args:
+            chunks: List of text chunks to embed, or (text, token_count)
+                pairs
+            batch_size: Maximum number of chunks sent in each request
+            concurrency: Maximum number of concurrent requests
+            max_batch_tokens: Optional token budget per request; only
+                applied when chunks carry token counts
+            client: Optional client from async_client to send the
+                requests with; if None, one is opened for this call
+            
+        Returns:
+            List of embedding vectors in input order
+            
+        Raises:
+            EmbeddingError: If embedding generation fails
+        """
+        if not chunks:
+            return []
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def embed_batch(
+            client: AsyncAzureOpenAI,
+            batch: List[str]
+        ) -> List[List[float]]:
+            async with semaphore:
+                response = await client.embeddings.create(
+                    model=self.config.dimensions,
+                    input=batch
+                )
+            return [
+                data.embedding
+                for data in sorted(response.data, key=lambda d: d.index)
+            ]
+
+        async def embed_batches(
+            client: AsyncAzureOpenAI,
+            batches: List[List[int]]
+        ) -> List[List[List[float]]]:
+            return await asyncio.gather(*[
+                embed_batch(client, [texts[j] for j in batch_indices])
+                for batch_indices in batches
+            ])
+
+        try:
+            texts, token_counts = _split_token_counts(chunks)
+            model = self.config.dimensions
+            embeddings = self.cache.get_many(model, texts)
+            # Repeated texts in this call are embedded only once
+            missing, duplicates = _unique_misses(texts, embeddings)
+            if not missing:
+                return embeddings
+
+            batches = _plan_batches(
+                missing, token_counts, batch_size, max_batch_tokens
+            )
+            if client is not None:
+                results = await embed_batches(client, batches)
+            else:
+                async with self.async_client() as own_client:
+                    results = await embed_batches(own_client, batches)
+
+            for batch_indices, batch_embeddings in zip(batches, results):
+                for j, embedding in zip(batch_indices, batch_embeddings):
+                    embeddings[j] = embedding
+                self.cache.set_many(
+                    model,
+                    [texts[j] for j in batch_indices],
+                    batch_embeddings
+                )
+            for j, first in duplicates.items():
+                embeddings[j] = list(embeddings[first])
+            return embeddings
+        except Exception as e:
+            raise EmbeddingError(
+                f"Failed to generate embeddings: {str(e)}"
+            )
+
+    def embed_chunks_concurrent(
+        self,
+        chunks: List[str],
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY
+    ) -> List[List[float]]:
+        """
+        Synchronous wrapper around aembed_chunks for non-async callers.
+        
+        Args:
+            chunks: List of text chunks to embed
+            batch_size: Number of chunks sent in each embeddings request
+            concurrency: Maximum number of concurrent requests
+            
+        Returns:
+            List of embedding vectors in input order
+            
+        Raises:
+            EmbeddingError: If embedding generation fails
+        """
+        return asyncio.run(
+            self.aembed_chunks(chunks, batch_size, concurrency)
+        )
+
     def embed_single(self, text: str) -> List[float]:
         """
         Generate embedding for a single text chunk.
@@ -145,12 +471,22 @@ class Embedder:
         Raises:
             EmbeddingError: If embedding generation fails
         """
+        if not text:
+            return []
+
         try:
+            model = self.config.dimensions
+            cached = self.cache.get_many(model, [text])[0]
+            if cached is not None:
+                return cached
+            
             response = self._client.embeddings.create(
-                model=self.config.dimensions,
+                model=model,
                 input=text
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self.cache.set_many(model, [text], [embedding])
+            return embedding
         except Exception as e:
             raise EmbeddingError(
                 f"Failed to generate single embedding: {str(e)}"
@@ -0,0 +1,219 @@
+
+"""
+Content-addressed cache for text embeddings.
+Lets repeated chunks (boilerplate, unchanged document revisions) reuse
+previously generated vectors instead of calling the embeddings API again.
+The SQLite-backed cache keeps vectors across runs, so re-processing a
+document only embeds the chunks that changed.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+
+CacheKey = Tuple[str, bytes]
+
+
+def make_cache_key(model: str, text: str) -> CacheKey:
+    """Build the cache key for a text embedded with a given model."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    return model, digest
+
+
+class EmbeddingCache:
+    """In-process LRU cache of embeddings keyed by model and text hash."""
+
+    def __init__(self, maxsize: int = 10_000):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of vectors kept before evicting the
+                least recently used entry
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        # Vectors are stored as packed float32 arrays, not lists of floats
+        self._entries: "OrderedDict[CacheKey, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(
+        self,
+        model: str,
+        texts: Sequence[str]
+    ) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for several texts.
+
+        Args:
+            model: Embedding model the vectors were generated with
+            texts: Texts to look up
+
+        Returns:
+            One vector per text, or None where the text is not cached
+        """
+        keys = [make_cache_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is None:
+                    results.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                results.append(vector.tolist())
+        return results
+
+    def set_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """
+        Store embeddings for several texts.
+
+        Args:
+            model: Embedding model the vectors were generated with
+            texts: Texts that were embedded
+            vectors: Embedding vectors, aligned with texts
+        """
+        items = [
+            (make_cache_key(model, text), array("f", vector))
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            for key, vector in items:
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteEmbeddingCache:
+    """
+    Persistent embedding cache stored in a SQLite database file.
+
+    Has the same interface as EmbeddingCache. Vectors are stored as packed
+    float32 bytes under the same (model, text hash) key; entries are never
+    evicted, so delete the file to reset the cache.
+    """
+
+    # Stay under SQLite's default limit on bound parameters per statement
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, path: str):
+        """
+        Initialize the cache, creating the database file if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        # One connection shared by the embedder's worker threads, guarded
+        # by the lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, "
+                "hash BLOB NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, hash)"
+                ") WITHOUT ROWID"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COUNT(*) FROM embeddings"
+            ).fetchone()
+        return row[0]
+
+    def get_many(
+        self,
+        model: str,
+        texts: Sequence[str]
+    ) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for several texts.
+
+        Args:
+            model: Embedding model the vectors were generated with
+            texts: Texts to look up
+
+        Returns:
+            One vector per text, or None where the text is not cached
+        """
+        digests = [make_cache_key(model, text)[1] for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(digests), self._LOOKUP_BATCH):
+                batch = digests[start:start + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._connection.execute(
+                    "SELECT hash, vector FROM embeddings "
+                    f"WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch]
+                ))
+
+        results: List[Optional[List[float]]] = []
+        for digest in digests:
+            blob = found.get(digest)
+            if blob is None:
+                results.append(None)
+                continue
+            vector = array("f")
+            vector.frombytes(blob)
+            results.append(vector.tolist())
+        return results
+
+    def set_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """
+        Store embeddings for several texts.
+
+        Args:
+            model: Embedding model the vectors were generated with
+            texts: Texts that were embedded
+            vectors: Embedding vectors, aligned with texts
+        """
+        rows = [
+            (model, make_cache_key(model, text)[1],
+             array("f", vector).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, hash, vector) "
+                "VALUES (?, ?, ?)",
+                rows
+            )
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
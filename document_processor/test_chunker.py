@@ -0,0 +1,131 @@
+"""Tests for the text chunking functionality."""
+
+import pytest
+import tiktoken
+from unittest.mock import patch
+from .chunker import ChunkerError, TextChunker, open_text_blocks
+
+
+@pytest.fixture
+def byte_encoding():
+    """Provide an offline byte-level encoding (one token per byte)."""
+    return tiktoken.Encoding(
+        name="test-bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+
+@pytest.fixture
+def chunker(byte_encoding):
+    """Provide a chunker backed by the byte-level encoding."""
+    with patch.dict(
+        'document_processor.chunker._BACKENDS',
+        {'tiktoken': lambda model_name: byte_encoding}
+    ):
+        yield TextChunker()
+
+
+def test_chunk_text_by_words(chunker):
+    """Test word-boundary chunking slices the original text."""
+    chunks = chunker.chunk_text_by_words("  a b  c\nd e ", max_tokens=2)
+    assert chunks == ["a b", "c\nd", "e"]
+    assert chunker.chunk_text_by_words("   ", max_tokens=2) == []
+
+
+def test_chunk_by_tokens(chunker):
+    """Test token-based chunking."""
+    chunks = chunker.chunk_by_tokens("abcdefghij", max_tokens=4)
+    assert chunks == ["abcd", "efgh", "ij"]
+
+
+def test_chunk_by_tokens_with_counts(chunker):
+    """Test chunking that also reports token counts."""
+    chunks = chunker.chunk_by_tokens_with_counts("abcdefghij", max_tokens=4)
+    assert chunks == [("abcd", 4), ("efgh", 4), ("ij", 2)]
+
+
+def test_chunk_by_tokens_batch(chunker):
+    """Test batch chunking matches per-text chunking."""
+    texts = ["abcdefghij", "", "xyz"]
+    results = chunker.chunk_by_tokens_batch(texts, max_tokens=4)
+    assert results == [
+        chunker.chunk_by_tokens(text, max_tokens=4) for text in texts
+    ]
+
+
+def test_chunk_with_overlap(chunker):
+    """Test overlapping chunks."""
+    chunks = chunker.chunk_with_overlap("abcdefghij", max_tokens=4, overlap=1)
+    assert chunks == ["abcd", "defg", "ghij"]
+
+
+def test_chunk_with_overlap_no_redundant_tail(chunker):
+    """Test that no trailing chunk repeats only the previous overlap."""
+    chunks = chunker.chunk_with_overlap("abcdefgh", max_tokens=6, overlap=2)
+    assert chunks == ["abcdef", "efgh"]
+    assert chunker.chunk_with_overlap("ab", max_tokens=6, overlap=2) == ["ab"]
+    assert chunker.chunk_with_overlap("", max_tokens=6, overlap=2) == []
+
+
+def test_open_text_blocks(tmp_path):
+    """Test mapped blocks end at newlines and reproduce the text."""
+    path = tmp_path / "doc.txt"
+    path.write_bytes("ab\r\ncdé\nefgh\ni".encode("utf-8"))
+
+    with open_text_blocks(path, block_size=3) as blocks:
+        assert list(blocks) == ["ab\n", "cdé\n", "efgh\n", "i"]
+
+    path.write_bytes(b"")
+    with open_text_blocks(path) as blocks:
+        assert list(blocks) == []
+
+
+def test_iter_chunk_with_overlap(chunker):
+    """Test streamed chunking matches whole-text chunking."""
+    lines = ["abc\n", "defg\n", "hij\n", "klmnop\n", "q\n"]
+    text = "".join(lines)
+    for max_tokens, overlap in [(4, 1), (6, 2), (5, 0), (64, 2)]:
+        expected = chunker.chunk_with_overlap(text, max_tokens, overlap)
+        streamed = chunker.iter_chunk_with_overlap(
+            iter(lines), max_tokens, overlap, block_size=4
+        )
+        assert list(streamed) == expected
+    assert list(chunker.iter_chunk_with_overlap(iter([]))) == []
+
+    with pytest.raises(ValueError):
+        chunker.iter_chunk_with_overlap(iter(lines), max_tokens=4, overlap=4)
+
+
+def test_count_tokens(chunker):
+    """Test token counting."""
+    assert chunker.count_tokens("hello") == 5
+
+
+def test_invalid_params(chunker):
+    """Test parameter validation."""
+    with pytest.raises(ValueError):
+        chunker.chunk_by_tokens("text", max_tokens=0)
+
+    with pytest.raises(ValueError):
+        chunker.chunk_with_overlap("text", max_tokens=4, overlap=4)
+
+
+def test_count_tokens_batch(chunker):
+    """Test batch token counting."""
+    counts = chunker.count_tokens_batch(["hello", "", "héllo"])
+    assert counts.tolist() == [5, 0, 6]
+
+
+def test_is_within_token_limit(chunker):
+    """Test the token limit check."""
+    assert chunker.is_within_token_limit("hello", 5)
+    assert not chunker.is_within_token_limit("hello", 4)
+    assert not chunker.is_within_token_limit("héllo", 5)
+
+
+def test_unknown_backend():
+    """Test that an unknown tokenizer backend is rejected."""
+    with pytest.raises(ChunkerError):
+        TextChunker(backend="unknown")
@@ -1,8 +1,25 @@
 """Tests for the embeddings generation functionality."""
 
+import asyncio
+import numpy as np
 import pytest
-from unittest.mock import Mock, patch
-from .embedder import Embedder, EmbeddingConfig, EmbeddingError
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from .embedder import (
+    Embedder,
+    EmbeddingConfig,
+    EMBED_BATCH_SIZE,
+    EmbeddingError,
+    _get_default_cache
+)
+from .embedding_cache import SQLiteEmbeddingCache
+
+
+@pytest.fixture(autouse=True)
+def clear_default_cache():
+    """Start each test with an empty shared embedding cache."""
+    _get_default_cache().clear()
+    yield
+    _get_default_cache().clear()
 
 
 @pytest.fixture
@@ -27,7 +44,7 @@ def mock_response():
 
 def test_embedder_initialization(mock_config):
     """Test embedder initialization with config."""
-    with patch('openai.AzureOpenAI'):
+    with patch('document_processor.embedder.AzureOpenAI'):
         embedder = Embedder(config=mock_config)
         assert embedder.config == mock_config
 
@@ -42,14 +59,15 @@ def test_embedder_env_initialization():
         "AZURE_OPENAI_DIMENSIONS": "text-embedding-ada-002"
     }
     
-    with patch.dict('os.environ', env_vars), patch('openai.AzureOpenAI'):
+    with patch.dict('os.environ', env_vars), \
+            patch('document_processor.embedder.AzureOpenAI'):
         embedder = Embedder()
         assert embedder.config.endpoint == env_vars["AZURE_OPENAI_ENDPOINT"]
 
 
 def test_embed_chunks(mock_config, mock_response):
     """Test batch embedding generation."""
-    with patch('openai.AzureOpenAI') as mock_client:
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
         mock_instance = Mock()
         mock_instance.embeddings.create.return_value = mock_response
         mock_client.return_value = mock_instance
@@ -63,9 +81,231 @@ def test_embed_chunks(mock_config, mock_response):
         assert mock_instance.embeddings.create.call_count == 2
 
 
+def test_embed_chunks_single_request_per_batch(mock_config):
+    """Test that each batch is embedded with one API request."""
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        response = Mock()
+        response.data = [
+            Mock(index=1, embedding=[0.2]),
+            Mock(index=0, embedding=[0.1])
+        ]
+        mock_instance = Mock()
+        mock_instance.embeddings.create.return_value = response
+        mock_client.return_value = mock_instance
+        
+        embedder = Embedder(config=mock_config)
+        embeddings = embedder.embed_chunks(["test1", "test2"])
+        
+        assert embeddings == [[0.1], [0.2]]
+        mock_instance.embeddings.create.assert_called_once_with(
+            model=mock_config.dimensions,
+            input=["test1", "test2"]
+        )
+
+
+def test_embed_chunks_default_batch_size(mock_config):
+    """Test that chunks are sent EMBED_BATCH_SIZE at a time by default."""
+    def create(model, input):
+        response = Mock()
+        response.data = [
+            Mock(index=i, embedding=[float(i)]) for i in range(len(input))
+        ]
+        return response
+
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        mock_instance = Mock()
+        mock_instance.embeddings.create.side_effect = create
+        mock_client.return_value = mock_instance
+
+        embedder = Embedder(config=mock_config)
+        chunks = [f"chunk {i}" for i in range(EMBED_BATCH_SIZE * 2 + 1)]
+        assert len(embedder.embed_chunks(chunks)) == len(chunks)
+
+        sizes = [
+            len(call.kwargs["input"])
+            for call in mock_instance.embeddings.create.call_args_list
+        ]
+        assert sizes == [EMBED_BATCH_SIZE, EMBED_BATCH_SIZE, 1]
+
+
+def test_embed_chunks_token_budget(mock_config):
+    """Test that (text, token_count) chunks are packed by token budget."""
+    def create(model, input):
+        response = Mock()
+        response.data = [
+            Mock(index=i, embedding=[0.5]) for i in range(len(input))
+        ]
+        return response
+
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        mock_instance = Mock()
+        mock_instance.embeddings.create.side_effect = create
+        mock_client.return_value = mock_instance
+        
+        embedder = Embedder(config=mock_config)
+        chunks = [("a", 600), ("b", 300), ("c", 500), ("d", 100)]
+        embeddings = embedder.embed_chunks(chunks, max_batch_tokens=1000)
+        
+        assert len(embeddings) == 4
+        inputs = [
+            call.kwargs['input']
+            for call in mock_instance.embeddings.create.call_args_list
+        ]
+        assert inputs == [["a", "b"], ["c", "d"]]
+
+
+def test_embed_chunks_concurrent(mock_config):
+    """Test concurrent batch embedding preserves input order."""
+    async def create(model, input):
+        response = Mock()
+        response.data = [
+            Mock(index=i, embedding=[float(text[-1])])
+            for i, text in enumerate(input)
+        ]
+        return response
+
+    async_client_path = 'document_processor.embedder.AsyncAzureOpenAI'
+    with patch('document_processor.embedder.AzureOpenAI'), \
+            patch(async_client_path) as mock_async:
+        mock_instance = MagicMock()
+        mock_instance.__aenter__ = AsyncMock(return_value=mock_instance)
+        mock_instance.__aexit__ = AsyncMock(return_value=False)
+        mock_instance.embeddings.create = AsyncMock(side_effect=create)
+        mock_async.return_value = mock_instance
+        
+        embedder = Embedder(config=mock_config)
+        chunks = [f"test{i}" for i in range(5)]
+        embeddings = embedder.embed_chunks_concurrent(chunks, batch_size=2)
+        
+        assert embeddings == [[float(i)] for i in range(5)]
+        assert mock_instance.embeddings.create.call_count == 3
+
+
+def test_aembed_chunks_shares_async_client(mock_config):
+    """Test calls given a client reuse it instead of opening their own."""
+    async def create(model, input):
+        response = Mock()
+        response.data = [
+            Mock(index=i, embedding=[float(len(text))])
+            for i, text in enumerate(input)
+        ]
+        return response
+
+    async_client_path = 'document_processor.embedder.AsyncAzureOpenAI'
+    with patch('document_processor.embedder.AzureOpenAI'), \
+            patch(async_client_path) as mock_async:
+        mock_instance = MagicMock()
+        mock_instance.__aenter__ = AsyncMock(return_value=mock_instance)
+        mock_instance.__aexit__ = AsyncMock(return_value=False)
+        mock_instance.embeddings.create = AsyncMock(side_effect=create)
+        mock_async.return_value = mock_instance
+
+        embedder = Embedder(config=mock_config)
+
+        async def run():
+            async with embedder.async_client() as client:
+                first = await embedder.aembed_chunks(["a"], client=client)
+                second = await embedder.aembed_chunks(["bb"], client=client)
+            return first, second
+
+        assert asyncio.run(run()) == ([[1.0]], [[2.0]])
+        mock_async.assert_called_once()
+        mock_instance.__aexit__.assert_awaited_once()
+        assert mock_instance.embeddings.create.call_count == 2
+
+
+def test_embed_chunks_uses_cache(mock_config):
+    """Test that cached chunks are not sent to the API again."""
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        response = Mock()
+        response.data = [Mock(index=0, embedding=[0.5, 0.25])]
+        mock_instance = Mock()
+        mock_instance.embeddings.create.return_value = response
+        mock_client.return_value = mock_instance
+        
+        embedder = Embedder(config=mock_config)
+        first = embedder.embed_chunks(["repeated"])
+        second = embedder.embed_chunks(["repeated"])
+        
+        assert first == second == [[0.5, 0.25]]
+        mock_instance.embeddings.create.assert_called_once()
+
+        # The default cache is shared, so a new embedder reuses it
+        other = Embedder(config=mock_config)
+        assert other.embed_chunks(["repeated"]) == [[0.5, 0.25]]
+        mock_instance.embeddings.create.assert_called_once()
+
+
+def test_sqlite_cache_persists(mock_config, tmp_path):
+    """Test that vectors in the SQLite cache survive a new embedder."""
+    path = str(tmp_path / "embeddings.db")
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        response = Mock()
+        response.data = [Mock(index=0, embedding=[0.5, 0.25])]
+        mock_instance = Mock()
+        mock_instance.embeddings.create.return_value = response
+        mock_client.return_value = mock_instance
+
+        cache = SQLiteEmbeddingCache(path)
+        Embedder(config=mock_config, cache=cache).embed_chunks(["stored"])
+        cache.close()
+
+        cache = SQLiteEmbeddingCache(path)
+        embedder = Embedder(config=mock_config, cache=cache)
+        assert embedder.embed_chunks(["stored"]) == [[0.5, 0.25]]
+        assert len(cache) == 1
+        mock_instance.embeddings.create.assert_called_once()
+        assert cache.get_many("other-model", ["stored"]) == [None]
+        cache.close()
+
+
+def test_embed_chunks_array(mock_config):
+    """Test embeddings returned as a contiguous 2-D array."""
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        response = Mock()
+        response.data = [
+            Mock(index=0, embedding=[0.5, 0.25]),
+            Mock(index=1, embedding=[0.75, 1.0])
+        ]
+        mock_instance = Mock()
+        mock_instance.embeddings.create.return_value = response
+        mock_client.return_value = mock_instance
+        
+        embedder = Embedder(config=mock_config)
+        array = embedder.embed_chunks_array(
+            ["test1", "test2"], dtype=np.float16
+        )
+        
+        assert array.shape == (2, 2)
+        assert array.dtype == np.float16
+        assert array.flags['C_CONTIGUOUS']
+
+
+def test_embed_chunks_deduplicates(mock_config):
+    """Test that repeated chunks in one call are embedded once."""
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
+        response = Mock()
+        response.data = [
+            Mock(index=0, embedding=[0.5]),
+            Mock(index=1, embedding=[0.25])
+        ]
+        mock_instance = Mock()
+        mock_instance.embeddings.create.return_value = response
+        mock_client.return_value = mock_instance
+        
+        embedder = Embedder(config=mock_config)
+        embeddings = embedder.embed_chunks(["a", "b", "a", "a"])
+        
+        assert embeddings == [[0.5], [0.25], [0.5], [0.5]]
+        mock_instance.embeddings.create.assert_called_once_with(
+            model=mock_config.dimensions,
+            input=["a", "b"]
+        )
+
+
 def test_embed_single(mock_config, mock_response):
     """Test single text embedding."""
-    with patch('openai.AzureOpenAI') as mock_client:
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
         mock_instance = Mock()
         mock_instance.embeddings.create.return_value = mock_response
         mock_client.return_value = mock_instance
@@ -80,7 +320,7 @@ def test_embed_single(mock_config, mock_response):
 
 def test_error_handling(mock_config):
     """Test error handling in embedding operations."""
-    with patch('openai.AzureOpenAI') as mock_client:
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
         mock_instance = Mock()
         mock_instance.embeddings.create.side_effect = Exception("API Error")
         mock_client.return_value = mock_instance
@@ -96,6 +336,8 @@ def test_error_handling(mock_config):
 
 def test_empty_input(mock_config):
     """Test handling of empty input."""
-    with patch('openai.AzureOpenAI'):
+    with patch('document_processor.embedder.AzureOpenAI') as mock_client:
         embedder = Embedder(config=mock_config)
-        assert embedder.embed_chunks([]) == []
\ No newline at end of file
+        assert embedder.embed_chunks([]) == []
+        assert embedder.embed_single("") == []
+        mock_client.return_value.embeddings.create.assert_not_called()
\ No newline at end of file
@@ -5,15 +5,33 @@ Provides functionality to search and retrieve documents using Azure
 Cognitive Search.
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dataclasses import dataclass
+import numpy as np
+from azure.core.credentials import AccessToken, TokenCredential
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient as AsyncSearchClient
 from azure.search.documents.models import VectorizedQuery
+from document_search.http_transport import (
+    get_async_transport,
+    get_transport
+)
+from document_search.local_index import LocalVectorIndex
+from document_search.search_cache import (
+    DEFAULT_TTL,
+    SemanticQueryCache,
+    TTLCache
+)
  
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SearchResult:
     """Represents a single document search result."""
     id: str
@@ -25,23 +43,28 @@ class SearchResult:
     @classmethod
     def from_json(cls, json_data: Dict[str, Any]) -> 'SearchResult':
         """Create a SearchResult instance from JSON data."""
+        get = json_data.get
+        score = get('@search.score', 0.0)
+        # Positional construction; called once per hit on large pages
         return cls(
-            id=json_data['id'],
-            document_id=json_data['documentid'],
-            content=json_data.get('content', ''),
-            score=float(json_data.get('@search.score', 0.0)),
-            tags=json_data.get('tags', [])
+            json_data['id'],
+            json_data['documentid'],
+            get('content', ''),
+            score if type(score) is float else float(score),
+            get('tags', [])
         )
 
     @classmethod
     def from_vector_results(cls, result: Any) -> 'SearchResult':
         """Create a SearchResult instance from Vector data."""
+        get = result.get
+        score = get('@search.score', 0.0)
         return cls(
-            id=result.get("id", ""),
-            document_id=result.get("document_id", ""),
-            content=result.get("content", ""),
-            score=float(result.get('@search.score', 0.0)),
-            tags=result.get("tags", [])
+            get("id", ""),
+            get("documentid", ""),
+            get("content", ""),
+            score if type(score) is float else float(score),
+            get("tags", [])
         )
 
 
@@ -50,116 +73,484 @@ class AzureSearchError(Exception):
     pass
 
 
+class _AsyncTokenCredential:
+    """
+    Async credential backed by a long-lived synchronous one.
+
+    Async credentials are bound to the event loop they first run on, so
+    one can't be kept across asyncio.run calls. This adapter can: tokens
+    are fetched through the sync credential in a worker thread and
+    reused until shortly before they expire.
+    """
+
+    # Seconds before expiry at which a cached token is refreshed
+    REFRESH_MARGIN = 300
+
+    def __init__(self, credential: TokenCredential):
+        self._credential = credential
+        self._tokens: Dict[Tuple[str, ...], AccessToken] = {}
+
+    async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        token = self._tokens.get(scopes)
+        refresh_at = time.time() + self.REFRESH_MARGIN
+        if token is None or token.expires_on < refresh_at:
+            token = await asyncio.to_thread(
+                self._credential.get_token, *scopes, **kwargs
+            )
+            self._tokens[scopes] = token
+        return token
+
+    async def close(self) -> None:
+        # The sync credential is owned and closed by AzureSearchClient
+        pass
+
+    async def __aenter__(self) -> '_AsyncTokenCredential':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+# Candidate search.in delimiters, in order of preference
+_TAG_DELIMITERS = (",", "|", ";", "~")
+
+
+@lru_cache(maxsize=256)
+def _tags_filter(tags: Tuple[str, ...]) -> str:
+    """
+    Build the OData filter matching documents with any of the given tags.
+
+    Args:
+        tags: Sorted, de-duplicated tags to match
+
+    Returns:
+        OData filter expression
+    """
+    escaped = [tag.replace("'", "''") for tag in tags]
+    # search.in is evaluated faster than an OR chain of any() clauses,
+    # but it splits on the delimiter, so pick one no tag contains
+    for delimiter in _TAG_DELIMITERS:
+        if not any(delimiter in tag for tag in escaped):
+            values = delimiter.join(escaped)
+            return f"tags/any(t: search.in(t, '{values}', '{delimiter}'))"
+    return " or ".join(f"tags/any(t: t eq '{tag}')" for tag in escaped)
+
+
+def build_tags_filter(filter_tags: Optional[List[str]]) -> Optional[str]:
+    """Get the cached tag filter expression, or None without tags."""
+    if not filter_tags:
+        return None
+    return _tags_filter(tuple(sorted(set(filter_tags))))
+
+
 class AzureSearchClient:
     """Client for interacting with Azure Cognitive Search."""
 
+    SEMANTIC_INDEX = "semantic_documents"
+    VECTOR_INDEX = "vector_documents"
+    # Built once and shared by every query; the SDK only reads it
+    SELECT_FIELDS = ["id", "documentid", "content", "tags"]
+
     def __init__(
         self,
-        endpoint: str
+        endpoint: Optional[str],
+        *,
+        cache_ttl: float = DEFAULT_TTL,
+        similarity_threshold: float = 0.95,
+        local_index: Optional[LocalVectorIndex] = None
     ):
         """
         Initialize the Azure Search client.
 
         Args:
-            endpoint: Azure Search service endpoint
+            endpoint: Azure Search service endpoint; may be None when
+                only vector searches against a local index are run
+            cache_ttl: Seconds cached search results stay valid
+            similarity_threshold: Minimum cosine similarity for a vector
+                query to reuse the results of a cached one
+            local_index: Optional local index that answers vector
+                searches in-process instead of the service
         """
-        self.endpoint = endpoint.rstrip('/')
+        if endpoint is None and local_index is None:
+            raise ValueError("endpoint is required without a local index")
+        self.endpoint = endpoint.rstrip('/') if endpoint else None
+        self.local_index = local_index
+        
+        # Credentials and per-index clients are reused across searches
+        self._credential = DefaultAzureCredential()
+        self._async_credential = _AsyncTokenCredential(self._credential)
+        self._clients: Dict[str, SearchClient] = {}
+
+        # Exact-match cache for text queries, similarity cache for vectors
+        self._result_cache = TTLCache(ttl=cache_ttl)
+        self._vector_cache = SemanticQueryCache(
+            ttl=cache_ttl,
+            threshold=similarity_threshold
+        )
         
         # Set up logging
         self.logger = logging.getLogger(__name__)
+
+    def _client_for(self, index_name: str) -> SearchClient:
+        """Get the shared search client for an index, creating it once."""
+        client = self._clients.get(index_name)
+        if client is None:
+            client = SearchClient(
+                endpoint=self.endpoint,
+                index_name=index_name,
+                credential=self._credential,
+                transport=get_transport()
+            )
+            self._clients[index_name] = client
+        return client
+
+    def close(self) -> None:
+        """Close the per-index search clients and the credential."""
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+        self._credential.close()
+
+    def clear_cache(self) -> None:
+        """Drop all cached search results."""
+        self._result_cache.clear()
+        self._vector_cache.clear()
+
+    def __enter__(self) -> 'AzureSearchClient':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @staticmethod
+    def _vector_query(
+        embeddings: List[float] | np.ndarray,
+        top: int
+    ) -> VectorizedQuery:
+        """Build the vector query for a single embedding."""
+        # The SDK serializes plain lists; convert only at the boundary
+        if isinstance(embeddings, np.ndarray):
+            embeddings = embeddings.astype(np.float32, copy=False).tolist()
+        return VectorizedQuery(
+            vector=embeddings,
+            k_nearest_neighbors=top,
+            fields="large_embedding",
+            kind="vector",
+            exhaustive=True
+        )
         
     def vector_search(
         self,
-        embeddings: list,
+        embeddings: List[float] | np.ndarray,
         filter_tags: Optional[List[str]] = None,
-        top: int = 5
-    ) -> List[SearchResult]:
+        top: int = 5,
+        cache: bool = True
+    ) -> Iterator[SearchResult]:
         """
-        Perform semantic search using Azure Cognitive Search.
+        Perform vector search using Azure Cognitive Search.
+        When the client has a local index, it is searched instead.
+        Results are yielded as the SDK pages them in; wrap the call in
+        list() when all results are needed at once.
         Args:
-            search_text: The text to search for
+            embeddings: Query vector, as a list or a 1-D numpy array
+            filter_tags: Optional tags; matches documents with any of them
             top: Maximum number of results to return
+            cache: Reuse results of a recent, near-identical query
         Returns:
-            List of SearchResult objects sorted by relevance
+            Iterator of SearchResult objects sorted by relevance
         Raises:
             AzureSearchError: If the search operation fails
         """
+        if self.local_index is not None:
+            try:
+                results = self.local_index.search(
+                    embeddings, top, filter_tags
+                )
+            except Exception as e:
+                self.logger.error("Vector search failed: %s", str(e))
+                raise AzureSearchError(f"Search failed: {str(e)}")
+            to_result = SearchResult.from_vector_results
+            for result in results:
+                yield to_result(result)
+            return
+
+        filter_expression = build_tags_filter(filter_tags)
+        context = (filter_expression, top)
+        if cache:
+            cached = self._vector_cache.get(embeddings, context)
+            if cached is not None:
+                yield from cached
+                return
+
         try:
-            # Azure Cognitive Search configuration
-            index_name = "vector_documents"
-            credential = DefaultAzureCredential()
-            # Create search client
-            search_client = SearchClient(
-                endpoint=self.endpoint,
-                index_name=index_name,
-                credential=credential
-            )
-            vector_query = VectorizedQuery(
-                vector=embeddings,
-                k_nearest_neighbors=5,
-                fields="large_embedding",
-                kind="vector",
-                exhaustive=True
-            )
+            search_client = self._client_for(self.VECTOR_INDEX)
+            vector_query = self._vector_query(embeddings, top)
 
             results = search_client.search(
                 search_text=None,
                 vector_queries=[vector_query],
-                select=["id", "documentid", "content", "tags"],
+                select=self.SELECT_FIELDS,
+                filter=filter_expression,
+                top=top,
             )
-            # Convert to SearchResult objects
-            return [SearchResult.from_vector_results(result)
-                    for result in results]
+            # Convert to SearchResult objects as results arrive
+            # Bound once; the loop body runs for every hit
+            to_result = SearchResult.from_vector_results
+            collected: List[SearchResult] = []
+            append = collected.append
+            for result in results:
+                search_result = to_result(result)
+                append(search_result)
+                yield search_result
         except Exception as e:
-            self.logger.error("Semantic search failed: %s", str(e))
+            self.logger.error("Vector search failed: %s", str(e))
+            raise AzureSearchError(f"Search failed: {str(e)}")
+
+        # Only cache result sets that were read to the end
+        if cache:
+            self._vector_cache.set(embeddings, context, tuple(collected))
+
+    async def avector_search_many(
+        self,
+        vectors: List[List[float]] | np.ndarray,
+        top: int = 5,
+        concurrency: int = 8,
+        cache: bool = True
+    ) -> List[List[SearchResult]]:
+        """
+        Run several vector searches concurrently.
+        When the client has a local index, it is searched instead.
+        Args:
+            vectors: Query vectors, as lists or rows of a 2-D numpy array
+            top: Maximum number of results to return per query
+            concurrency: Maximum number of searches in flight at once
+            cache: Reuse results of recent, near-identical queries
+        Returns:
+            One list of SearchResult objects per query, in input order
+        Raises:
+            AzureSearchError: If any search operation fails
+        """
+        if self.local_index is not None:
+            return [
+                list(self.vector_search(embeddings, top=top))
+                for embeddings in vectors
+            ]
+
+        # Same context as an unfiltered vector_search, so the two share
+        # cached results
+        context = (None, top)
+        found: List[Optional[List[SearchResult]]] = []
+        misses: List[int] = []
+        for i, embeddings in enumerate(vectors):
+            cached = None
+            if cache:
+                cached = self._vector_cache.get(embeddings, context)
+            if cached is None:
+                misses.append(i)
+                found.append(None)
+            else:
+                found.append(list(cached))
+        if not misses:
+            return found
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search_one(
+            search_client: AsyncSearchClient,
+            embeddings: List[float] | np.ndarray
+        ) -> List[SearchResult]:
+            async with semaphore:
+                results = await search_client.search(
+                    search_text=None,
+                    vector_queries=[self._vector_query(embeddings, top)],
+                    select=self.SELECT_FIELDS,
+                    top=top,
+                )
+                to_result = SearchResult.from_vector_results
+                return [to_result(result) async for result in results]
+
+        try:
+            # One client (and connection pool) shared by every query;
+            # the credential outlives it and keeps its cached token
+            async with AsyncSearchClient(
+                endpoint=self.endpoint,
+                index_name=self.VECTOR_INDEX,
+                credential=self._async_credential,
+                transport=get_async_transport()
+            ) as search_client:
+                searched = await asyncio.gather(*[
+                    search_one(search_client, vectors[i]) for i in misses
+                ])
+        except Exception as e:
+            self.logger.error("Vector search failed: %s", str(e))
             raise AzureSearchError(f"Search failed: {str(e)}")
 
+        for i, results in zip(misses, searched):
+            found[i] = results
+            if cache:
+                self._vector_cache.set(vectors[i], context, tuple(results))
+        return found
+
+    def vector_search_many(
+        self,
+        vectors: List[List[float]] | np.ndarray,
+        top: int = 5,
+        concurrency: int = 8,
+        cache: bool = True
+    ) -> List[List[SearchResult]]:
+        """
+        Synchronous wrapper around avector_search_many.
+        Args:
+            vectors: Query vectors, as lists or rows of a 2-D numpy array
+            top: Maximum number of results to return per query
+            concurrency: Maximum number of searches in flight at once
+            cache: Reuse results of recent, near-identical queries
+        Returns:
+            One list of SearchResult objects per query, in input order
+        Raises:
+            AzureSearchError: If any search operation fails
+        """
+        return asyncio.run(
+            self.avector_search_many(vectors, top, concurrency, cache)
+        )
+
     def semantic_search(
         self,
         search_text: str,
         filter_tags: Optional[List[str]] = None,
-        top: int = 5
-    ) -> List[SearchResult]:
+        top: int = 5,
+        cache: bool = True
+    ) -> Iterator[SearchResult]:
         """
         Perform semantic search using Azure Cognitive Search.
+        Results are yielded as the SDK pages them in; wrap the call in
+        list() when all results are needed at once.
         Args:
             search_text: The text to search for
+            filter_tags: Optional tags; matches documents with any of them
             top: Maximum number of results to return
+            cache: Reuse results of a recent identical query
         Returns:
-            List of SearchResult objects sorted by relevance
+            Iterator of SearchResult objects sorted by relevance
         Raises:
             AzureSearchError: If the search operation fails
         """
-        try:
-            # Azure Cognitive Search configuration
-            index_name = "semantic_documents"
-            credential = DefaultAzureCredential()
-            # Create search client
-            search_client = SearchClient(
-                endpoint=self.endpoint,
-                index_name=index_name,
-                credential=credential
-            )
+        if not search_text:
+            return
+
+        # Construct filter expression if tags are provided
+        filter_expression = build_tags_filter(filter_tags)
+        cache_key = (search_text, filter_expression, top)
+        if cache:
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                yield from cached
+                return
 
-            # Construct filter expression if tags are provided
-            filter_expression = None
-            if filter_tags:
-                filter_expression = " or ".join([f"tags/any(t: t eq '{tag}')"
-                                                 for tag in filter_tags])
+        try:
+            search_client = self._client_for(self.SEMANTIC_INDEX)
 
             # Perform semantic search with size limit
-            
-            results = list(search_client.search(
+            results = search_client.search(
                 search_text=search_text,
                 top=top,
-                select=["id", "documentid", "content", "tags"],
+                select=self.SELECT_FIELDS,
                 query_type="semantic",
                 filter=filter_expression,
                 semantic_configuration_name="default",
-            ))
-            # Convert to SearchResult objects
-            return [SearchResult.from_json(result) for result in results]
-            
+            )
+            # Convert to SearchResult objects as results arrive
+            # Bound once; the loop body runs for every hit
+            to_result = SearchResult.from_json
+            collected: List[SearchResult] = []
+            append = collected.append
+            for result in results:
+                search_result = to_result(result)
+                append(search_result)
+                yield search_result
+
         except Exception as e:
             self.logger.error("Semantic search failed: %s", str(e))
             raise AzureSearchError(f"Search failed: {str(e)}")
+
+        # Only cache result sets that were read to the end
+        if cache:
+            self._result_cache.set(cache_key, tuple(collected))
+
+    def get_document_by_id(
+        self,
+        key: str,
+        index_name: str = VECTOR_INDEX
+    ) -> Optional[SearchResult]:
+        """
+        Fetch a single document by its key.
+        Uses the document lookup API (GET /docs/<key>), which reads the
+        document directly instead of running a filtered search.
+        Args:
+            key: Document key (the "id" field)
+            index_name: Index to read from
+        Returns:
+            The document as a SearchResult, or None if no document has
+            the key
+        Raises:
+            AzureSearchError: If the lookup fails
+        """
+        if not key:
+            return None
+
+        try:
+            document = self._client_for(index_name).get_document(
+                key=key,
+                selected_fields=self.SELECT_FIELDS
+            )
+        except ResourceNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.error("Document lookup failed: %s", str(e))
+            raise AzureSearchError(f"Lookup failed: {str(e)}")
+        return SearchResult.from_json(document)
+
+
+# Shared clients are kept until close_search_clients; an evicted client
+# would be dropped without closing its credential and connections
+_ClientKey = Tuple[Optional[str], Optional[str]]
+_search_clients: Dict[_ClientKey, AzureSearchClient] = {}
+_search_clients_lock = threading.Lock()
+
+
+def get_search_client(
+    endpoint: Optional[str],
+    local_index_path: Optional[str] = None
+) -> AzureSearchClient:
+    """
+    Get the process-wide search client for an endpoint.
+
+    Repeated searches reuse its credential, per-index clients and result
+    caches. Callers share it, so do not close it or use it as a context
+    manager; call close_search_clients at shutdown instead.
+
+    Args:
+        endpoint: Azure Search service endpoint
+        local_index_path: Optional directory of a saved LocalVectorIndex
+            to answer vector searches from
+    """
+    key = (endpoint, local_index_path)
+    with _search_clients_lock:
+        client = _search_clients.get(key)
+        if client is None:
+            local_index = (
+                LocalVectorIndex.load(local_index_path)
+                if local_index_path else None
+            )
+            client = AzureSearchClient(endpoint, local_index=local_index)
+            _search_clients[key] = client
+        return client
+
+
+def close_search_clients() -> None:
+    """Close every shared search client, e.g. at process shutdown."""
+    with _search_clients_lock:
+        clients = list(_search_clients.values())
+        _search_clients.clear()
+    for client in clients:
+        client.close()
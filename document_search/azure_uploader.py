@@ -1,29 +1,32 @@
 
-from azure.identity import DefaultAzureCredential
-from azure.search.documents import SearchClient
-from models.semantic_document import DocumentChunk
+from functools import partial
+from typing import Collection, Iterable
+from document_search.batch_upload import (
+    delete_index_documents,
+    upload_index_document,
+    upload_index_documents
+)
+from document_search.vector_uploader import to_search_document
+from models.embedding_document import EmbeddingDocumentChunk
 
-# Authenticate using RBAC
-credential = DefaultAzureCredential()
+# Embedded chunks in the same document shape as the vector index
 index_name = "semantic_documents"
 
 
-class AzureSearchError(Exception):
-    """Custom exception for Azure Search operations."""
-    pass
-
-
 def delete_all_files(
-    search_endpoint: str
+    search_endpoint: str,
+    keep: Collection[str] = ()
 ) -> int:
     """
     Delete all documents from Azure Search index.
+
+    Pages through the whole index by key and deletes each page in a
+    batch request, so indexes larger than one result page are cleared.
     
     Args:
-        search_endpoint: Azure Search query endpoint
-        document_endpoint: Azure Search document endpoint
-        api_key: Azure Search API key
-        batch_size: Number of documents to process in each batch
+        search_endpoint: Azure Search service endpoint
+        keep: Keys of documents to leave in the index, e.g. the chunks
+            just uploaded when replacing a document
         
     Returns:
         int: Number of documents deleted
@@ -31,41 +34,18 @@ def delete_all_files(
     Raises:
         AzureSearchError: If there's an error communicating with Azure Search
     """
-    
-    # Create search client
-    search_client = SearchClient(endpoint=search_endpoint,
-                                 index_name=index_name,
-                                 credential=credential)
-
-    # Perform a search
-    results = search_client.search(search_text="*")
-    # Collect document IDs to delete
-    document_ids = [doc["id"] for doc in results]
-    # Delete documents
-    if document_ids:
-        delete_actions = [
-            {"@search.action": "delete", "id": doc_id}
-            for doc_id in document_ids
-        ]
-        search_client.upload_documents(documents=delete_actions)
-        print(
-            f"Deleted {len(document_ids)} documents "
-            f"from index '{index_name}'."
-        )
-    else:
-        print("No documents found to delete.")
-
-    deleted_count = len(document_ids)
-    print(f"Successfully deleted {deleted_count} documents.")
-    return deleted_count
+    return delete_index_documents(search_endpoint, index_name, keep)
 
 
 def upload_to_azure(
-    document: DocumentChunk,
+    document: EmbeddingDocumentChunk,
     search_endpoint: str,
 ) -> None:
     """
     Upload a document chunk to Azure Search using the DocumentChunk model.
+
+    Prefer upload_many_to_azure for more than one chunk; it sends them in
+    batches instead of one request each.
     
     Args:
         document (DocumentChunk): The document chunk to upload
@@ -74,27 +54,39 @@ def upload_to_azure(
     Raises:
         AzureSearchError: If the upload fails
     """
-    try:
-        # Create search client
-        search_client = SearchClient(
-            endpoint=search_endpoint,
-            index_name=index_name,
-            credential=credential
-        )
-        
-        # Convert DocumentChunk to search document format
-        search_doc = {
-            "id": document.id,
-            "documentid": document.document_id,
-            "content": document.content,
-            "tags": document.tags,
-            "large_embedding": document.embeddings
-        }
-        
-        # Upload documents directly
-        search_client.upload_documents(documents=search_doc)
+    upload_index_document(
+        search_endpoint, index_name, to_search_document(document)
+    )
+
 
-        print("Document uploaded to Azure AI Search index.")
-    except Exception as e:
-        raise AzureSearchError(f"Upload failed: {str(e)}")
+def upload_many_to_azure(
+    documents: Iterable[EmbeddingDocumentChunk],
+    search_endpoint: str,
+    quantize: bool = False
+) -> int:
+    """
+    Upload many document chunks to Azure Search in concurrent batches.
+
+    Chunks are grouped into batch index requests sent from a bounded
+    thread pool instead of one request per chunk; throttled documents are
+    retried with exponential backoff.
+
+    Args:
+        documents: The document chunks to upload
+        search_endpoint: Azure Search service endpoint
+        quantize: Send embeddings as int8 codes, about a quarter of the
+            payload; the vector field must be Collection(Edm.SByte)
+            compared by cosine
 
+    Returns:
+        int: Number of documents uploaded
+
+    Raises:
+        AzureSearchError: If the upload fails
+    """
+    return upload_index_documents(
+        search_endpoint,
+        index_name,
+        documents,
+        partial(to_search_document, quantize=quantize)
+    )
@@ -0,0 +1,508 @@
+
+"""
+Concurrent batch uploads and deletes for Azure AI Search.
+Splits search documents into index batches and sends them from a bounded
+thread pool, retrying throttled documents with exponential backoff. The
+index uploader modules share the upload clients and the delete and
+upload entry points defined here.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+import orjson
+from azure.core.exceptions import HttpResponseError
+from azure.identity import DefaultAzureCredential
+from azure.search.documents import SearchClient
+from document_search.azure_ai_search import AzureSearchError
+from document_search.http_transport import (
+    get_transport,
+    get_upload_policies
+)
+
+
+# Service limits are 1000 documents and 16 MB per index request; the
+# byte budget leaves headroom for the request envelope
+BATCH_SIZE = 1000
+MAX_BATCH_BYTES = 14 * 1024 * 1024
+MIN_BATCH_SIZE = 10
+# Batches in flight at once
+MAX_WORKERS = 12
+DELETE_WORKERS = 8
+MAX_ATTEMPTS = 6
+# Largest skip the service accepts when paging without a key cursor
+MAX_SKIP = 100_000
+# Per-document status codes that mean throttled or busy, not rejected
+RETRYABLE_STATUS_CODES = frozenset({429, 503})
+
+# Batch size learned from 413 responses, kept for the rest of the process
+_batch_size = BATCH_SIZE
+_batch_size_lock = threading.Lock()
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Get the exponential backoff delay in seconds for a retry attempt."""
+    return min(30.0, 0.5 * 2 ** attempt)
+
+
+def get_batch_size() -> int:
+    """Get the current adaptive batch size."""
+    return _batch_size
+
+
+def _shrink_batch_size(rejected_size: int) -> None:
+    """Halve the batch size below a batch the service found too large."""
+    global _batch_size
+    with _batch_size_lock:
+        _batch_size = max(
+            MIN_BATCH_SIZE, min(_batch_size, rejected_size // 2)
+        )
+
+
+def iter_batches(
+    documents: Iterable[Dict],
+    batch_size: int = BATCH_SIZE,
+    max_batch_bytes: int = MAX_BATCH_BYTES
+) -> Iterator[List[Dict]]:
+    """
+    Group search documents into batches bounded by count and payload size.
+
+    A batch is flushed once it holds batch_size documents or adding the
+    next document would take its estimated JSON size past max_batch_bytes.
+    A single document larger than the byte budget is sent on its own.
+
+    Args:
+        documents: Search documents to group
+        batch_size: Maximum documents per batch
+        max_batch_bytes: Maximum estimated JSON bytes per batch
+
+    Yields:
+        List[Dict]: Batches of search documents
+    """
+    batch: List[Dict] = []
+    batch_bytes = 0
+    for document in documents:
+        # Compact UTF-8 JSON length, as sent on the wire
+        size = len(orjson.dumps(document))
+        if batch and (
+            len(batch) >= batch_size or batch_bytes + size > max_batch_bytes
+        ):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(document)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def _send_batch(send: Callable[..., List], batch: List[Dict]) -> int:
+    """
+    Send one index batch, retrying documents the service throttled.
+
+    Whole-request failures (429/503 responses) are already retried by the
+    SDK retry policy; this handles the per-document 429/503 results the
+    service returns inside a partially successful batch. The SDK also
+    splits a batch rejected with 413; when that happens the adaptive batch
+    size is halved so later batches are not rejected again.
+
+    Args:
+        send: Batch method of the client for the target index, e.g.
+            upload_documents or delete_documents
+        batch: Search documents keyed by "id"
+
+    Returns:
+        int: Number of documents indexed
+
+    Raises:
+        AzureSearchError: If a document is rejected or stays throttled
+    """
+    too_large: List[int] = []
+
+    def _on_response(pipeline_response) -> None:
+        if pipeline_response.http_response.status_code == 413:
+            too_large.append(413)
+
+    pending = batch
+    for attempt in range(MAX_ATTEMPTS):
+        results = send(
+            documents=pending,
+            raw_response_hook=_on_response
+        )
+        if too_large:
+            _shrink_batch_size(len(pending))
+            too_large.clear()
+        by_key = {doc["id"]: doc for doc in pending}
+        throttled = []
+        for result in results:
+            if result.succeeded:
+                continue
+            if result.status_code not in RETRYABLE_STATUS_CODES:
+                raise AzureSearchError(
+                    f"Indexing failed for document {result.key}: "
+                    f"{result.error_message}"
+                )
+            throttled.append(by_key[result.key])
+
+        if not throttled:
+            return len(batch)
+        pending = throttled
+        time.sleep(_backoff_delay(attempt))
+
+    raise AzureSearchError(
+        f"Indexing throttled for {len(pending)} documents "
+        f"after {MAX_ATTEMPTS} attempts"
+    )
+
+
+def upload_in_batches(
+    search_client: SearchClient,
+    documents: Iterable[Dict],
+    batch_size: Optional[int] = None,
+    max_workers: int = MAX_WORKERS,
+    max_batch_bytes: int = MAX_BATCH_BYTES
+) -> int:
+    """
+    Upload search documents in batches sent concurrently.
+
+    Documents are consumed lazily, so a generator is converted and sent
+    batch by batch rather than materialized up front.
+
+    Args:
+        search_client: Client for the target index
+        documents: Search documents keyed by "id"
+        batch_size: Maximum documents per index request; defaults to the
+            adaptive batch size
+        max_workers: Maximum number of batches in flight
+        max_batch_bytes: Maximum estimated JSON bytes per index request
+
+    Returns:
+        int: Number of documents uploaded
+
+    Raises:
+        AzureSearchError: If any batch fails
+    """
+    if batch_size is None:
+        batch_size = get_batch_size()
+    if batch_size <= 0 or max_workers <= 0 or max_batch_bytes <= 0:
+        raise ValueError(
+            "batch_size, max_workers and max_batch_bytes must be positive"
+        )
+
+    batches = iter_batches(documents, batch_size, max_batch_bytes)
+    first = next(batches, None)
+    if first is None:
+        return 0
+    second = next(batches, None)
+    if second is None:
+        return _send_batch(search_client.upload_documents, first)
+
+    # Batches are built from the documents as earlier ones are sent;
+    # waiting on the oldest batch bounds how many are held at once
+    uploaded = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: Deque[Future] = deque()
+        for batch in chain((first, second), batches):
+            in_flight.append(executor.submit(
+                _send_batch, search_client.upload_documents, batch
+            ))
+            if len(in_flight) >= max_workers:
+                uploaded += in_flight.popleft().result()
+        for future in in_flight:
+            uploaded += future.result()
+    return uploaded
+
+
+def _iter_skipped_id_pages(
+    search_client: SearchClient,
+    page_size: int
+) -> Iterator[List[Dict]]:
+    """
+    Page through document keys with skip, for indexes whose id field is
+    not sortable and filterable.
+
+    Every key is read before the first page is yielded, since deleting
+    pages as they are read would shift the later ones. The service caps
+    skip at 100,000, so at most about that many keys are returned.
+
+    Args:
+        search_client: Client for the target index
+        page_size: Keys per page
+
+    Yields:
+        List[Dict]: Pages of {"id": ...} documents
+    """
+    keys: List[Dict] = []
+    while len(keys) <= MAX_SKIP:
+        results = search_client.search(
+            search_text="*",
+            select=["id"],
+            skip=len(keys),
+            top=page_size
+        )
+        page = [{"id": doc["id"]} for doc in results]
+        keys.extend(page)
+        if len(page) < page_size:
+            break
+    for start in range(0, len(keys), page_size):
+        yield keys[start:start + page_size]
+
+
+def _iter_id_pages(
+    search_client: SearchClient,
+    page_size: int
+) -> Iterator[List[Dict]]:
+    """
+    Page through every document key in an index.
+
+    Pages are read with a key cursor (id gt '<last id>', ordered by id)
+    rather than skip, which the service caps at 100,000, so the whole
+    index is covered and deleting earlier pages does not shift later ones.
+    The cursor needs the id field to be sortable and filterable in the
+    index schema; if the service rejects the first cursor query, keys are
+    paged with skip instead.
+
+    Args:
+        search_client: Client for the target index
+        page_size: Keys per page
+
+    Yields:
+        List[Dict]: Pages of {"id": ...} documents
+    """
+    cursor: Optional[str] = None
+    while True:
+        try:
+            results = search_client.search(
+                search_text="*",
+                select=["id"],
+                filter=cursor,
+                order_by=["id asc"],
+                top=page_size
+            )
+            page = [{"id": doc["id"]} for doc in results]
+        except HttpResponseError as e:
+            if cursor is not None or e.status_code != 400:
+                raise
+            # The id field is not sortable or not filterable
+            yield from _iter_skipped_id_pages(search_client, page_size)
+            return
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"].replace("'", "''")
+        cursor = f"id gt '{last_id}'"
+
+
+def delete_all_documents(
+    search_client: SearchClient,
+    page_size: int = BATCH_SIZE,
+    max_workers: int = DELETE_WORKERS,
+    keep: Collection[str] = ()
+) -> int:
+    """
+    Delete every document in an index, except those with a kept key.
+
+    Each page of keys is handed to a thread pool for deletion while the
+    next page is fetched, so reads and deletes overlap. See _iter_id_pages
+    for the index schema the key paging expects.
+
+    Args:
+        search_client: Client for the target index
+        page_size: Keys fetched and deleted per request
+        max_workers: Maximum number of delete batches in flight
+        keep: Keys of documents to leave in the index
+
+    Returns:
+        int: Number of documents deleted
+
+    Raises:
+        AzureSearchError: If any delete batch fails
+    """
+    if page_size <= 0 or max_workers <= 0:
+        raise ValueError("page_size and max_workers must be positive")
+
+    # Waiting on the oldest batch bounds how many pages are held at once
+    deleted = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: Deque[Future] = deque()
+        for page in _iter_id_pages(search_client, page_size):
+            if keep:
+                page = [doc for doc in page if doc["id"] not in keep]
+                if not page:
+                    continue
+            in_flight.append(executor.submit(
+                _send_batch, search_client.delete_documents, page
+            ))
+            if len(in_flight) >= max_workers:
+                deleted += in_flight.popleft().result()
+        for future in in_flight:
+            deleted += future.result()
+    return deleted
+
+
+# Upload clients are kept until close_upload_clients; an evicted client
+# would be dropped without closing it
+_upload_clients: Dict[Tuple[str, str], SearchClient] = {}
+_upload_clients_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_credential() -> DefaultAzureCredential:
+    """
+    Get the shared RBAC credential, creating it on first use.
+
+    Deferred so importing the module does not build the credential chain.
+    """
+    return DefaultAzureCredential()
+
+
+def get_upload_client(search_endpoint: str, index_name: str) -> SearchClient:
+    """Get the shared upload client for an index, creating it once."""
+    key = (search_endpoint, index_name)
+    with _upload_clients_lock:
+        client = _upload_clients.get(key)
+        if client is None:
+            client = SearchClient(
+                endpoint=search_endpoint,
+                index_name=index_name,
+                credential=_get_credential(),
+                transport=get_transport(),
+                per_call_policies=get_upload_policies()
+            )
+            _upload_clients[key] = client
+        return client
+
+
+def close_upload_clients() -> None:
+    """Close every shared upload client, e.g. at process shutdown."""
+    with _upload_clients_lock:
+        clients = list(_upload_clients.values())
+        _upload_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def delete_index_documents(
+    search_endpoint: str,
+    index_name: str,
+    keep: Collection[str] = ()
+) -> int:
+    """
+    Delete all documents from an index and report the count.
+
+    Args:
+        search_endpoint: Azure Search service endpoint
+        index_name: Index to clear
+        keep: Keys of documents to leave in the index
+
+    Returns:
+        int: Number of documents deleted
+
+    Raises:
+        AzureSearchError: If there's an error communicating with Azure Search
+    """
+    try:
+        deleted_count = delete_all_documents(
+            get_upload_client(search_endpoint, index_name),
+            keep=keep
+        )
+    except AzureSearchError:
+        raise
+    except Exception as e:
+        raise AzureSearchError(f"Delete failed: {str(e)}")
+
+    if deleted_count:
+        print(
+            f"Deleted {deleted_count} documents "
+            f"from index '{index_name}'."
+        )
+    else:
+        print("No documents found to delete.")
+    return deleted_count
+
+
+def upload_index_document(
+    search_endpoint: str,
+    index_name: str,
+    search_document: Dict[str, Any]
+) -> None:
+    """
+    Upload a single search document to an index.
+
+    Args:
+        search_endpoint: Azure Search service endpoint
+        index_name: Target index
+        search_document: Document in the index's format
+
+    Raises:
+        AzureSearchError: If the upload fails
+    """
+    try:
+        # Same path as batches, so a rejected document raises and a
+        # throttled one is retried
+        upload_in_batches(
+            get_upload_client(search_endpoint, index_name),
+            [search_document]
+        )
+    except AzureSearchError:
+        raise
+    except Exception as e:
+        raise AzureSearchError(f"Upload failed: {str(e)}")
+
+    print("Document uploaded to Azure AI Search index.")
+
+
+def upload_index_documents(
+    search_endpoint: str,
+    index_name: str,
+    documents: Iterable[Any],
+    to_search_document: Callable[[Any], Dict[str, Any]]
+) -> int:
+    """
+    Convert and upload many documents to an index in concurrent batches.
+
+    Args:
+        search_endpoint: Azure Search service endpoint
+        index_name: Target index
+        documents: Documents to upload
+        to_search_document: Converts a document to the index's format
+
+    Returns:
+        int: Number of documents uploaded
+
+    Raises:
+        AzureSearchError: If the upload fails
+    """
+    # Converted lazily as the batches are filled
+    search_docs = (to_search_document(document) for document in documents)
+
+    try:
+        uploaded = upload_in_batches(
+            get_upload_client(search_endpoint, index_name),
+            search_docs
+        )
+    except AzureSearchError:
+        raise
+    except Exception as e:
+        raise AzureSearchError(f"Upload failed: {str(e)}")
+
+    if uploaded:
+        print(f"Uploaded {uploaded} documents to index '{index_name}'.")
+    return uploaded
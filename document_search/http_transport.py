@@ -0,0 +1,179 @@
+
+"""
+Shared HTTP transport for Azure AI Search clients.
+All SearchClient instances in the process send requests through one pooled
+connection pool, so keep-alive connections and TLS sessions are reused
+instead of every client opening its own. When the optional httpx transport
+and `h2` are installed the pool speaks HTTP/2, multiplexing concurrent
+batch and search requests over a few connections. Upload clients can
+also gzip their request bodies.
+"""
+
+import gzip
+import importlib.util
+import threading
+from typing import List, Optional
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline import PipelineRequest
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from azure.core.pipeline.transport import (
+    AsyncHttpTransport,
+    HttpTransport,
+    RequestsTransport
+)
+from config import get_env_flag
+
+
+# Connection pool sizing for the shared session
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 64
+KEEPALIVE_CONNECTIONS = 32
+TIMEOUT = 30.0
+
+# Request compression is opt-in: check that the search service accepts
+# gzip-encoded index requests before enabling it
+COMPRESS_UPLOADS = get_env_flag("AZURE_SEARCH_GZIP_UPLOADS")
+
+_session: Optional[requests.Session] = None
+_http2_client: Optional[httpx.Client] = None
+_session_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """Check whether the optional HTTP/2 transport can be used."""
+    return (
+        importlib.util.find_spec("h2") is not None
+        and importlib.util.find_spec("azure.core.experimental") is not None
+    )
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide pooled session used by search clients.
+
+    Created on first use; the lock keeps concurrent uploaders from each
+    building their own pool. Throttling (429/503) is retried by the Azure
+    SDK retry policy, so the adapter itself does not retry.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_http2_client() -> httpx.Client:
+    """Get the process-wide HTTP/2 client used by search clients."""
+    global _http2_client
+    if _http2_client is None:
+        with _session_lock:
+            if _http2_client is None:
+                _http2_client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=POOL_MAXSIZE,
+                        max_keepalive_connections=KEEPALIVE_CONNECTIONS
+                    ),
+                    timeout=TIMEOUT
+                )
+    return _http2_client
+
+
+def close_session() -> None:
+    """Close the shared session and client and their pooled connections."""
+    global _session, _http2_client
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _http2_client is not None:
+            _http2_client.close()
+            _http2_client = None
+
+
+def get_transport() -> HttpTransport:
+    """
+    Get a transport backed by the shared connection pool.
+
+    Uses the HTTP/2 httpx client when available, otherwise the pooled
+    requests session. The pool is not owned by the transport, so closing
+    a SearchClient leaves the connections open for the other clients.
+    """
+    if http2_available():
+        from azure.core.experimental.transport import HttpXTransport
+        return HttpXTransport(client=get_http2_client(), client_owner=False)
+    return RequestsTransport(session=get_session(), session_owner=False)
+
+
+def get_async_transport() -> Optional[AsyncHttpTransport]:
+    """
+    Get an HTTP/2 transport for async search clients, or None to use the
+    SDK's default aiohttp transport.
+
+    Async connections are bound to the event loop that opened them, so
+    the transport owns its pool instead of sharing the process-wide one;
+    use it for one batch of concurrent requests and close it with the
+    client.
+    """
+    if not http2_available():
+        return None
+    from azure.core.experimental.transport import AsyncHttpXTransport
+    client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=POOL_MAXSIZE,
+            max_keepalive_connections=KEEPALIVE_CONNECTIONS
+        ),
+        timeout=TIMEOUT
+    )
+    return AsyncHttpXTransport(client=client, client_owner=True)
+
+
+class GzipRequestPolicy(SansIOHTTPPolicy):
+    """
+    Pipeline policy that gzip-compresses large request bodies.
+
+    Vector payloads are mostly JSON float arrays, which compress several
+    times over even at the fastest level. Added as a per-call policy, so
+    the body is compressed once and retries resend the compressed bytes.
+    """
+
+    def __init__(self, min_size: int = 1024, level: int = 1):
+        """
+        Initialize the policy.
+
+        Args:
+            min_size: Smallest body, in bytes, worth compressing
+            level: gzip compression level
+        """
+        self.min_size = min_size
+        self.level = level
+
+    def on_request(self, request: PipelineRequest) -> None:
+        http_request = request.http_request
+        if "Content-Encoding" in http_request.headers:
+            return
+        body = http_request.content
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not isinstance(body, bytes) or len(body) < self.min_size:
+            return
+        http_request.set_bytes_body(
+            gzip.compress(body, compresslevel=self.level)
+        )
+        http_request.headers["Content-Encoding"] = "gzip"
+
+
+def get_upload_policies() -> List[SansIOHTTPPolicy]:
+    """Get the extra per-call policies for clients that upload documents."""
+    return [GzipRequestPolicy()] if COMPRESS_UPLOADS else []
@@ -0,0 +1,267 @@
+
+"""
+Local vector index for offline and development searches.
+Holds the indexed chunks and their embeddings on disk, so small datasets
+can be searched in-process instead of round-tripping to Azure AI Search.
+Uses an HNSW graph when the optional `hnswlib` package is installed and
+exact cosine search otherwise, JIT-compiled when `numba` is installed.
+"""
+
+import importlib.util
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import orjson
+
+
+DOCUMENTS_FILE = "documents.json"
+VECTORS_FILE = "vectors.npy"
+HNSW_FILE = "hnsw.bin"
+
+# HNSW graph parameters
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Computes the score of every row of a matrix against a query vector
+ScoreKernel = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def hnswlib_available() -> bool:
+    """Check whether the optional HNSW backend can be used."""
+    return importlib.util.find_spec("hnswlib") is not None
+
+
+@lru_cache(maxsize=1)
+def _get_jit_scores() -> Optional[ScoreKernel]:
+    """
+    Get the numba-compiled row scoring kernel, or None without numba.
+
+    The kernel computes the dot product of every row with the query in
+    parallel over rows; compiled on first use.
+    """
+    if importlib.util.find_spec("numba") is None:
+        return None
+    from numba import njit, prange
+
+    @njit(parallel=True, fastmath=True)
+    def scores(vectors, query):
+        result = np.empty(vectors.shape[0], dtype=np.float32)
+        for i in prange(vectors.shape[0]):
+            total = np.float32(0.0)
+            for j in range(vectors.shape[1]):
+                total += vectors[i, j] * query[j]
+            result[i] = total
+        return result
+
+    return scores
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """Normalize the rows of a matrix, leaving zero rows as they are."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class LocalVectorIndex:
+    """
+    In-process vector index over indexed document chunks.
+
+    search returns hits shaped like the service's vector search results,
+    with the cosine similarity as "@search.score", so callers convert
+    them the same way as remote results.
+    """
+
+    def __init__(
+        self,
+        documents: List[Dict[str, Any]],
+        vectors: np.ndarray,
+        hnsw_index: Optional[Any] = None
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            documents: Chunk fields (id, documentid, content, tags), one
+                per row of vectors
+            vectors: Unit-length float32 embeddings
+            hnsw_index: Optional hnswlib index over the same rows
+        """
+        if len(documents) != len(vectors):
+            raise ValueError("documents and vectors must have equal length")
+        self.documents = documents
+        self.vectors = vectors
+        self._hnsw = hnsw_index
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, chunks: Iterable[Any]) -> 'LocalVectorIndex':
+        """
+        Build an index from embedded document chunks.
+
+        Args:
+            chunks: EmbeddingDocumentChunk objects
+
+        Returns:
+            LocalVectorIndex: The built index
+        """
+        documents = []
+        rows = []
+        for chunk in chunks:
+            documents.append({
+                "id": chunk.id,
+                "documentid": chunk.document_id,
+                "content": chunk.content,
+                "tags": chunk.tags
+            })
+            rows.append(chunk.embeddings)
+        if not rows:
+            return cls([], np.empty((0, 0), dtype=np.float32))
+
+        vectors = _unit_rows(np.asarray(rows, dtype=np.float32))
+        hnsw_index = None
+        if hnswlib_available():
+            import hnswlib
+            hnsw_index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            hnsw_index.init_index(
+                max_elements=len(vectors),
+                ef_construction=HNSW_EF_CONSTRUCTION,
+                M=HNSW_M
+            )
+            hnsw_index.add_items(vectors, np.arange(len(vectors)))
+        return cls(documents, vectors, hnsw_index)
+
+    def save(self, directory: str | Path) -> None:
+        """
+        Write the index to a directory, creating it if needed.
+
+        Args:
+            directory: Directory to write the index files to
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / DOCUMENTS_FILE).write_bytes(orjson.dumps(self.documents))
+        np.save(directory / VECTORS_FILE, self.vectors)
+        if self._hnsw is not None:
+            self._hnsw.save_index(str(directory / HNSW_FILE))
+
+    @classmethod
+    def load(cls, directory: str | Path) -> 'LocalVectorIndex':
+        """
+        Read an index written by save.
+
+        Args:
+            directory: Directory holding the index files
+
+        Returns:
+            LocalVectorIndex: The loaded index
+
+        Raises:
+            FileNotFoundError: If the index files don't exist
+        """
+        directory = Path(directory)
+        documents = orjson.loads((directory / DOCUMENTS_FILE).read_bytes())
+        vectors = np.load(directory / VECTORS_FILE)
+        hnsw_index = None
+        hnsw_path = directory / HNSW_FILE
+        if len(vectors) and hnsw_path.exists() and hnswlib_available():
+            import hnswlib
+            hnsw_index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            hnsw_index.load_index(str(hnsw_path), max_elements=len(vectors))
+        return cls(documents, vectors, hnsw_index)
+
+    def _matching_rows(self, filter_tags: Sequence[str]) -> np.ndarray:
+        """Get the rows of documents with any of the given tags."""
+        wanted = set(filter_tags)
+        return np.fromiter(
+            (
+                i for i, document in enumerate(self.documents)
+                if not wanted.isdisjoint(document["tags"] or ())
+            ),
+            dtype=np.int64
+        )
+
+    def _hnsw_search(
+        self,
+        query: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray]
+    ) -> Optional[Iterable]:
+        """Approximate search; None if the graph can't return k hits."""
+        self._hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+        allowed = None if rows is None else set(rows.tolist())
+        try:
+            labels, distances = self._hnsw.knn_query(
+                query,
+                k=k,
+                filter=None if allowed is None else allowed.__contains__
+            )
+        except RuntimeError:
+            # Too few reachable matches under a selective tag filter
+            return None
+        # hnswlib's cosine distance is 1 - cosine similarity
+        return zip(labels[0].tolist(), (1 - distances[0]).tolist())
+
+    def _exact_search(
+        self,
+        query: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray]
+    ) -> Iterable:
+        """Exact search over all candidate rows."""
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        # Rows and query are unit length, so dot products are cosines
+        jit_scores = _get_jit_scores()
+        if jit_scores is not None:
+            scores = jit_scores(np.ascontiguousarray(vectors), query)
+        else:
+            scores = vectors @ query
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        labels = best if rows is None else rows[best]
+        return zip(labels.tolist(), scores[best].tolist())
+
+    def search(
+        self,
+        embeddings: Sequence[float] | np.ndarray,
+        top: int = 5,
+        filter_tags: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the chunks most similar to a query vector.
+
+        Args:
+            embeddings: Query vector
+            top: Maximum number of results to return
+            filter_tags: Optional tags; matches documents with any of them
+
+        Returns:
+            Result documents sorted by descending cosine similarity
+        """
+        if not len(self) or top <= 0:
+            return []
+        query = np.asarray(embeddings, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.size != self.vectors.shape[1]:
+            return []
+        query = query / norm
+
+        rows = self._matching_rows(filter_tags) if filter_tags else None
+        if rows is not None and not rows.size:
+            return []
+        candidates = len(self) if rows is None else rows.size
+        k = min(top, candidates)
+
+        hits = None
+        if self._hnsw is not None:
+            hits = self._hnsw_search(query, k, rows)
+        if hits is None:
+            hits = self._exact_search(query, k, rows)
+
+        return [
+            {**self.documents[label], "@search.score": score}
+            for label, score in hits
+        ]
@@ -0,0 +1,175 @@
+
+"""
+Result caches for Azure AI Search queries.
+Repeated queries (retries, agent loops re-asking the same question) are
+answered from memory instead of another search round-trip.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+import numpy as np
+
+
+DEFAULT_TTL = 3600.0
+
+
+class TTLCache:
+    """LRU cache whose entries also expire a fixed time after being set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries before evicting the least
+                recently used one
+            ttl: Seconds an entry stays valid after it is set
+        """
+        if maxsize <= 0 or ttl <= 0:
+            raise ValueError("maxsize and ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get the cached value for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value for a key."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticQueryCache:
+    """
+    Cache keyed on query vectors that also matches near-identical queries.
+
+    A lookup returns the results of a cached query whose vector has cosine
+    similarity of at least the threshold with the new one and whose
+    context (filter, result count) is identical. Cached vectors are kept
+    as unit rows of one float32 matrix, so a lookup is a single
+    matrix-vector product; the oldest entry is overwritten when full.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = DEFAULT_TTL,
+        threshold: float = 0.95
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of cached queries
+            ttl: Seconds an entry stays valid after it is set
+            threshold: Minimum cosine similarity for a cache hit
+        """
+        if maxsize <= 0 or ttl <= 0:
+            raise ValueError("maxsize and ttl must be positive")
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[Tuple[Hashable, float, Any]]] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector: Any) -> Optional[np.ndarray]:
+        """Normalize a query vector, or None for a zero vector."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def get(self, vector: Any, context: Hashable) -> Optional[Any]:
+        """
+        Get the cached value for a similar query vector.
+
+        Args:
+            vector: Query vector
+            context: Other query parameters, which must match exactly
+
+        Returns:
+            The cached value, or None if no similar query is cached
+        """
+        query = self._unit(vector)
+        if query is None:
+            return None
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.size:
+                return None
+            scores = self._vectors @ query
+            candidates = np.flatnonzero(scores >= self.threshold)
+            now = time.monotonic()
+            # Most similar first
+            for index in candidates[np.argsort(-scores[candidates])]:
+                entry = self._entries[index]
+                if entry is not None and entry[0] == context \
+                        and entry[1] > now:
+                    return entry[2]
+        return None
+
+    def set(self, vector: Any, context: Hashable, value: Any) -> None:
+        """
+        Cache a value for a query vector.
+
+        Args:
+            vector: Query vector
+            context: Other query parameters the value depends on
+            value: Value to cache
+        """
+        query = self._unit(vector)
+        if query is None:
+            return
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.size:
+                # First entry, or the embedding model changed
+                self._vectors = np.zeros(
+                    (self.maxsize, query.size), dtype=np.float32
+                )
+                self._entries = [None] * self.maxsize
+                self._next = 0
+            slot = self._next
+            self._vectors[slot] = query
+            self._entries[slot] = (context, time.monotonic() + self.ttl, value)
+            self._next = (slot + 1) % self.maxsize
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._vectors = None
+            self._entries = []
+            self._next = 0
@@ -1,11 +1,19 @@
 """Tests for Azure AI Search integration."""
 
+import asyncio
+import time
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+from azure.core.credentials import AccessToken
+from azure.core.exceptions import ResourceNotFoundError
 from .azure_ai_search import (
     AzureSearchClient,
     SearchResult,
-    AzureSearchError
+    AzureSearchError,
+    _AsyncTokenCredential,
+    build_tags_filter,
+    close_search_clients,
+    get_search_client
 )
 
 
@@ -52,72 +60,186 @@ def test_search_result_from_json():
     assert result.tags == ["technical", "research"]
 
 
+def test_build_tags_filter():
+    """Test OData tag filter construction."""
+    assert build_tags_filter(None) is None
+    assert build_tags_filter([]) is None
+    assert build_tags_filter(["research", "technical"]) == (
+        "tags/any(t: search.in(t, 'research,technical', ','))"
+    )
+    # Order and duplicates do not change the expression
+    assert build_tags_filter(["technical", "research", "technical"]) == (
+        build_tags_filter(["research", "technical"])
+    )
+    # Single quotes are escaped; commas switch the delimiter
+    assert build_tags_filter(["o'neil"]) == (
+        "tags/any(t: search.in(t, 'o''neil', ','))"
+    )
+    assert build_tags_filter(["a,b", "c"]) == (
+        "tags/any(t: search.in(t, 'a,b|c', '|'))"
+    )
+    # Only when every delimiter is taken does it fall back to an OR chain
+    assert build_tags_filter([",|;~", "c"]) == (
+        "tags/any(t: t eq ',|;~') or tags/any(t: t eq 'c')"
+    )
+
+
 def test_azure_search_client_initialization():
     """Test client initialization."""
-    endpoint = "https://test.search.windows.net"
-    client = AzureSearchClient(endpoint, "test-key")
-    assert client.endpoint == endpoint
-    assert client.api_key == "test-key"
-    
-    with pytest.raises(ValueError):
-        AzureSearchClient("", "test-key")
-    
-    with pytest.raises(ValueError):
-        AzureSearchClient("https://test.search.windows.net", "")
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'):
+        client = AzureSearchClient("https://test.search.windows.net/")
+        assert client.endpoint == "https://test.search.windows.net"
+        assert client.local_index is None
+
+        # Options are keyword-only, so a stray positional key fails loudly
+        with pytest.raises(TypeError):
+            AzureSearchClient("https://test.search.windows.net", "test-key")
+
+        with pytest.raises(ValueError):
+            AzureSearchClient(None)
 
 
 def test_search_documents(mock_response):
-    """Test document search functionality."""
-    with patch('requests.post') as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = mock_response
-        
-        endpoint = "https://test.search.windows.net"
-        client = AzureSearchClient(endpoint, "test-key")
-        results = client.search_documents("test query")
-        
+    """Test semantic search returns ranked results and caches them."""
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'), \
+            patch('document_search.azure_ai_search.SearchClient') as mock_cls:
+        mock_client = mock_cls.return_value
+        mock_client.search.return_value = iter(mock_response["value"])
+
+        client = AzureSearchClient("https://test.search.windows.net")
+        results = list(client.semantic_search("test query", ["technical"]))
+
         assert len(results) == 2
         assert all(isinstance(r, SearchResult) for r in results)
         assert results[0].score > results[1].score
+        kwargs = mock_client.search.call_args.kwargs
+        assert kwargs["query_type"] == "semantic"
+        assert kwargs["filter"] == build_tags_filter(["technical"])
+
+        # A repeated query is answered from the result cache
+        assert list(client.semantic_search("test query", ["technical"])) \
+            == results
+        assert mock_client.search.call_count == 1
 
 
 def test_search_validation():
-    """Test search parameter validation."""
-    client = AzureSearchClient("https://test.search.windows.net", "test-key")
-    
-    with pytest.raises(ValueError):
-        client.search_documents("")
-    
-    with pytest.raises(ValueError):
-        client.search_documents("test", top=0)
-    
-    with pytest.raises(ValueError):
-        client.search_documents("test", skip=-1)
+    """Test an empty query returns no results without a request."""
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'), \
+            patch('document_search.azure_ai_search.SearchClient') as mock_cls:
+        client = AzureSearchClient("https://test.search.windows.net")
+
+        assert list(client.semantic_search("")) == []
+        mock_cls.return_value.search.assert_not_called()
 
 
 def test_search_error_handling():
     """Test error handling in search operations."""
-    with patch('requests.post') as mock_post:
-        mock_post.return_value.status_code = 400
-        mock_post.return_value.text = "Bad Request"
-        
-        endpoint = "https://test.search.windows.net"
-        client = AzureSearchClient(endpoint, "test-key")
-        
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'), \
+            patch('document_search.azure_ai_search.SearchClient') as mock_cls:
+        mock_cls.return_value.search.side_effect = Exception("Bad Request")
+
+        client = AzureSearchClient("https://test.search.windows.net")
+
         with pytest.raises(AzureSearchError):
-            client.search_documents("test query")
+            list(client.semantic_search("test query"))
+        with pytest.raises(AzureSearchError):
+            list(client.vector_search([0.1, 0.2]))
 
 
 def test_get_document_by_id(mock_response):
-    """Test retrieving a specific document."""
-    with patch('requests.post') as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = mock_response
-        
-        endpoint = "https://test.search.windows.net"
-        client = AzureSearchClient(endpoint, "test-key")
-        doc = client.get_document_by_id("test1")
-        
-        assert doc is not None
+    """Test retrieving a specific document by key."""
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'), \
+            patch('document_search.azure_ai_search.SearchClient') as mock_cls:
+        mock_client = mock_cls.return_value
+        mock_client.get_document.return_value = mock_response["value"][0]
+
+        client = AzureSearchClient("https://test.search.windows.net")
+        doc = client.get_document_by_id("doc1")
+
         assert isinstance(doc, SearchResult)
-        assert doc.document_id == "test1"
\ No newline at end of file
+        assert doc.id == "doc1"
+        assert doc.document_id == "test1"
+        assert mock_client.get_document.call_args.kwargs["key"] == "doc1"
+
+        mock_client.get_document.side_effect = ResourceNotFoundError()
+        assert client.get_document_by_id("missing") is None
+
+
+def test_get_search_client_is_shared():
+    """Test the search client is created once per endpoint."""
+    with patch('document_search.azure_ai_search.DefaultAzureCredential',
+               side_effect=lambda: MagicMock()):
+        close_search_clients()
+        first = get_search_client("https://test.search.windows.net")
+        assert get_search_client("https://test.search.windows.net") is first
+        other = get_search_client("https://other.search.windows.net")
+        assert other is not first
+
+        close_search_clients()
+
+        first._credential.close.assert_called_once()
+        other._credential.close.assert_called_once()
+        assert get_search_client("https://test.search.windows.net") \
+            is not first
+        close_search_clients()
+
+
+class FakeAsyncSearchClient:
+    """Async search client returning canned hits and counting queries."""
+
+    queries = 0
+
+    def __init__(self, **kwargs):
+        self.hits = kwargs.pop("hits")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def search(self, **kwargs):
+        FakeAsyncSearchClient.queries += 1
+
+        async def results():
+            for hit in self.hits:
+                yield hit
+        return results()
+
+
+def test_vector_search_many_uses_cache(mock_response):
+    """Test batched vector searches only send cache misses."""
+    def make_client(**kwargs):
+        return FakeAsyncSearchClient(hits=mock_response["value"], **kwargs)
+
+    FakeAsyncSearchClient.queries = 0
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'), \
+            patch('document_search.azure_ai_search.AsyncSearchClient',
+                  side_effect=make_client):
+        client = AzureSearchClient("https://test.search.windows.net")
+        first = client.vector_search_many([[1.0, 0.0], [0.0, 1.0]])
+        assert FakeAsyncSearchClient.queries == 2
+        second = client.vector_search_many([[0.0, 1.0], [1.0, 1.0]])
+        assert FakeAsyncSearchClient.queries == 3
+
+    assert [result.id for result in first[0]] == ["doc1", "doc2"]
+    assert second[0] == first[1]
+    assert len(second[1]) == 2
+
+
+def test_async_token_credential_reuses_token():
+    """Test the async credential adapter caches tokens until near expiry."""
+    credential = MagicMock()
+    credential.get_token.side_effect = [
+        AccessToken("fresh", int(time.time()) + 3600),
+        AccessToken("refreshed", int(time.time()) + 3600),
+    ]
+    adapter = _AsyncTokenCredential(credential)
+    scope = "https://search.azure.com/.default"
+
+    assert asyncio.run(adapter.get_token(scope)).token == "fresh"
+    assert asyncio.run(adapter.get_token(scope)).token == "fresh"
+    assert credential.get_token.call_count == 1
+
+    adapter._tokens[(scope,)] = AccessToken("stale", int(time.time()) + 10)
+    assert asyncio.run(adapter.get_token(scope)).token == "refreshed"
@@ -0,0 +1,274 @@
+"""Tests for concurrent batch uploads."""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from azure.core.exceptions import HttpResponseError
+from .azure_ai_search import AzureSearchError
+from . import batch_upload
+from .batch_upload import (
+    close_upload_clients,
+    delete_all_documents,
+    get_upload_client,
+    iter_batches,
+    upload_in_batches,
+    upload_index_documents
+)
+
+
+def _result(key, succeeded=True, status_code=200):
+    """Build an indexing result like the SDK returns."""
+    return SimpleNamespace(
+        key=key,
+        succeeded=succeeded,
+        status_code=status_code,
+        error_message=None if succeeded else "error"
+    )
+
+
+def _succeed_all(documents, **kwargs):
+    return [_result(doc["id"]) for doc in documents]
+
+
+def test_upload_in_batches():
+    """Test documents are split into batches and all uploaded."""
+    client = MagicMock()
+    client.upload_documents.side_effect = _succeed_all
+    documents = [{"id": str(i)} for i in range(250)]
+
+    assert upload_in_batches(client, documents, batch_size=100) == 250
+    sizes = sorted(
+        len(call.kwargs["documents"])
+        for call in client.upload_documents.call_args_list
+    )
+    assert sizes == [50, 100, 100]
+    assert upload_in_batches(client, []) == 0
+
+
+def test_upload_in_batches_consumes_lazily():
+    """Test a generator is converted batch by batch as batches are sent."""
+    produced = []
+
+    def documents():
+        for i in range(30):
+            produced.append(i)
+            yield {"id": str(i)}
+
+    def upload(documents, **kwargs):
+        # At most one batch (and the document closing it) is read ahead
+        assert len(produced) <= int(documents[-1]["id"]) + 1 + 11
+        return _succeed_all(documents)
+
+    client = MagicMock()
+    client.upload_documents.side_effect = upload
+
+    assert upload_in_batches(
+        client, documents(), batch_size=10, max_workers=1
+    ) == 30
+    assert client.upload_documents.call_count == 3
+
+
+def test_iter_batches_byte_budget():
+    """Test batches are flushed before exceeding the byte budget."""
+    documents = [{"id": str(i), "content": "x" * 40} for i in range(5)]
+    size = len('{"id":"0","content":"' + "x" * 40 + '"}')
+
+    batches = list(iter_batches(documents, max_batch_bytes=size * 2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+    # An oversized document still goes out on its own
+    batches = list(iter_batches(documents[:2], max_batch_bytes=1))
+    assert [len(batch) for batch in batches] == [1, 1]
+
+
+def test_upload_retries_throttled_documents():
+    """Test throttled documents are retried on their own."""
+    client = MagicMock()
+    client.upload_documents.side_effect = [
+        [_result("a"), _result("b", succeeded=False, status_code=503)],
+        [_result("b")]
+    ]
+
+    with patch('document_search.batch_upload.time.sleep') as mock_sleep:
+        uploaded = upload_in_batches(client, [{"id": "a"}, {"id": "b"}])
+
+    assert uploaded == 2
+    retried = client.upload_documents.call_args_list[1].kwargs["documents"]
+    assert retried == [{"id": "b"}]
+    mock_sleep.assert_called_once()
+
+
+def test_upload_rejected_document():
+    """Test a rejected document raises without retrying."""
+    client = MagicMock()
+    client.upload_documents.return_value = [
+        _result("a", succeeded=False, status_code=400)
+    ]
+
+    with pytest.raises(AzureSearchError):
+        upload_in_batches(client, [{"id": "a"}])
+    assert client.upload_documents.call_count == 1
+
+
+def test_upload_shrinks_batch_size_after_413():
+    """Test a 413 during upload halves the adaptive batch size."""
+    def upload(documents, raw_response_hook):
+        # The SDK splits the rejected batch and reports each response
+        for status_code in (413, 200, 200):
+            raw_response_hook(SimpleNamespace(
+                http_response=SimpleNamespace(status_code=status_code)
+            ))
+        return _succeed_all(documents)
+
+    client = MagicMock()
+    client.upload_documents.side_effect = upload
+    documents = [{"id": str(i)} for i in range(40)]
+
+    with patch.object(batch_upload, '_batch_size', 1000):
+        assert upload_in_batches(client, documents) == 40
+        assert batch_upload.get_batch_size() == 20
+
+
+def test_delete_all_documents_pages_by_key():
+    """Test every page of keys is fetched with a cursor and deleted."""
+    ids = [f"doc{i:02d}" for i in range(5)]
+
+    def search(filter=None, top=None, **kwargs):
+        start = 0 if filter is None else ids.index(filter.split("'")[1]) + 1
+        return [{"id": doc_id} for doc_id in ids[start:start + top]]
+
+    client = MagicMock()
+    client.search.side_effect = search
+    client.delete_documents.side_effect = _succeed_all
+
+    assert delete_all_documents(client, page_size=2) == 5
+    filters = [call.kwargs["filter"] for call in client.search.call_args_list]
+    assert filters == [None, "id gt 'doc01'", "id gt 'doc03'"]
+    deleted = sorted(
+        doc["id"]
+        for call in client.delete_documents.call_args_list
+        for doc in call.kwargs["documents"]
+    )
+    assert deleted == ids
+
+
+def test_delete_all_documents_bounds_pages_in_flight():
+    """Test key pages are read only as earlier deletes complete."""
+    ids = [f"doc{i:02d}" for i in range(10)]
+    read = []
+
+    def search(filter=None, top=None, **kwargs):
+        start = 0 if filter is None else ids.index(filter.split("'")[1]) + 1
+        page = [{"id": doc_id} for doc_id in ids[start:start + top]]
+        read.extend(page)
+        return page
+
+    def delete(documents, **kwargs):
+        # One delete in flight: at most the next page was read ahead
+        assert len(read) <= ids.index(documents[-1]["id"]) + 1 + 2
+        return _succeed_all(documents)
+
+    client = MagicMock()
+    client.search.side_effect = search
+    client.delete_documents.side_effect = delete
+
+    assert delete_all_documents(client, page_size=2, max_workers=1) == 10
+
+
+def test_delete_all_documents_falls_back_to_skip():
+    """Test keys are paged with skip when the id field isn't sortable."""
+    ids = [f"doc{i}" for i in range(5)]
+    rejected = HttpResponseError(message="id is not sortable")
+    rejected.status_code = 400
+
+    def search(order_by=None, skip=0, top=None, **kwargs):
+        if order_by:
+            raise rejected
+        return [{"id": doc_id} for doc_id in ids[skip:skip + top]]
+
+    client = MagicMock()
+    client.search.side_effect = search
+    client.delete_documents.side_effect = _succeed_all
+
+    assert delete_all_documents(client, page_size=2) == 5
+    skips = [call.kwargs.get("skip") for call in client.search.call_args_list]
+    assert skips == [None, 0, 2, 4]
+
+
+def test_delete_all_documents_keeps_given_keys():
+    """Test documents with kept keys are left in the index."""
+    ids = [f"doc{i:02d}" for i in range(5)]
+
+    def search(filter=None, top=None, **kwargs):
+        start = 0 if filter is None else ids.index(filter.split("'")[1]) + 1
+        return [{"id": doc_id} for doc_id in ids[start:start + top]]
+
+    client = MagicMock()
+    client.search.side_effect = search
+    client.delete_documents.side_effect = _succeed_all
+
+    keep = {"doc00", "doc01", "doc03"}
+    assert delete_all_documents(client, page_size=2, keep=keep) == 2
+    deleted = sorted(
+        doc["id"]
+        for call in client.delete_documents.call_args_list
+        for doc in call.kwargs["documents"]
+    )
+    assert deleted == ["doc02", "doc04"]
+    # The page of only kept keys sends no delete request
+    assert client.delete_documents.call_count == 2
+
+
+def test_delete_all_documents_retries_throttled_keys():
+    """Test keys the service throttles during a delete are retried."""
+    client = MagicMock()
+    client.search.side_effect = [[{"id": "a"}, {"id": "b"}]]
+    client.delete_documents.side_effect = [
+        [_result("a"), _result("b", succeeded=False, status_code=503)],
+        [_result("b")]
+    ]
+
+    with patch('document_search.batch_upload.time.sleep'):
+        assert delete_all_documents(client, page_size=5) == 2
+    retried = client.delete_documents.call_args_list[1].kwargs["documents"]
+    assert retried == [{"id": "b"}]
+    assert client.search.call_args.kwargs["select"] == ["id"]
+
+
+def test_upload_clients_shared_per_index():
+    """Test upload clients are created once per index and closed together."""
+    with patch.object(batch_upload, "_get_credential"), \
+            patch.object(batch_upload, "SearchClient") as mock_cls:
+        mock_cls.side_effect = lambda **kwargs: MagicMock()
+        close_upload_clients()
+        first = get_upload_client("https://test", "vector_documents")
+        assert get_upload_client("https://test", "vector_documents") is first
+        other = get_upload_client("https://test", "semantic_documents")
+        assert other is not first
+
+        close_upload_clients()
+
+    first.close.assert_called_once()
+    other.close.assert_called_once()
+
+
+def test_upload_index_documents_converts():
+    """Test documents are converted before upload and failures wrapped."""
+    client = MagicMock()
+    client.upload_documents.side_effect = _succeed_all
+    with patch.object(batch_upload, "get_upload_client", return_value=client):
+        uploaded = upload_index_documents(
+            "https://test",
+            "vector_documents",
+            range(3),
+            lambda i: {"id": str(i)}
+        )
+        assert uploaded == 3
+        sent = client.upload_documents.call_args.kwargs["documents"]
+        assert [doc["id"] for doc in sent] == ["0", "1", "2"]
+
+        client.upload_documents.side_effect = RuntimeError("boom")
+        with pytest.raises(AzureSearchError):
+            upload_index_documents(
+                "https://test", "vector_documents", [0], lambda i: {"id": "0"}
+            )
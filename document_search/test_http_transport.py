@@ -0,0 +1,28 @@
+"""Tests for the shared HTTP transport helpers."""
+
+import gzip
+from azure.core.pipeline import PipelineContext, PipelineRequest
+from azure.core.rest import HttpRequest
+from .http_transport import GzipRequestPolicy
+
+
+def _pipeline_request(body):
+    request = HttpRequest("POST", "https://example.invalid", content=body)
+    return PipelineRequest(request, PipelineContext(None))
+
+
+def test_gzip_request_policy_compresses_large_bodies():
+    """Test large bodies are gzip-encoded and small ones left alone."""
+    policy = GzipRequestPolicy(min_size=100)
+    body = '{"value": [' + ", ".join(["0.123456"] * 100) + ']}'
+
+    request = _pipeline_request(body)
+    policy.on_request(request)
+    http_request = request.http_request
+    assert http_request.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(http_request.content) == body.encode("utf-8")
+    assert int(http_request.headers["Content-Length"]) < len(body)
+
+    request = _pipeline_request('{"value": []}')
+    policy.on_request(request)
+    assert "Content-Encoding" not in request.http_request.headers
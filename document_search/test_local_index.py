@@ -0,0 +1,84 @@
+"""Tests for the local vector index."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+import pytest
+from .azure_ai_search import AzureSearchClient, AzureSearchError
+from .local_index import LocalVectorIndex
+
+
+@pytest.fixture
+def chunks():
+    """Provide embedded chunks with distinct directions and tags."""
+    return [
+        SimpleNamespace(
+            id=f"doc_chunk{i}",
+            document_id="doc",
+            content=f"content {i}",
+            tags=[tag],
+            embeddings=np.array(vector, dtype=np.float32)
+        )
+        for i, (vector, tag) in enumerate([
+            ([1.0, 0.0, 0.0], "a"),
+            ([0.8, 0.6, 0.0], "b"),
+            ([0.0, 1.0, 0.0], "a"),
+            ([0.0, 0.0, 2.0], "b")
+        ])
+    ]
+
+
+def test_search_orders_by_similarity(chunks, tmp_path):
+    """Test results are ranked by cosine similarity after a save/load."""
+    LocalVectorIndex.build(chunks).save(tmp_path)
+    index = LocalVectorIndex.load(tmp_path)
+
+    hits = index.search([1.0, 0.1, 0.0], top=2)
+    assert [hit["id"] for hit in hits] == ["doc_chunk0", "doc_chunk1"]
+    assert hits[0]["@search.score"] > hits[1]["@search.score"]
+    assert len(index.search([0.0, 0.0, 1.0], top=10)) == 4
+
+
+def test_search_filter_tags(chunks):
+    """Test only documents with a requested tag are returned."""
+    index = LocalVectorIndex.build(chunks)
+
+    hits = index.search([1.0, 0.0, 0.0], top=5, filter_tags=["b"])
+    assert [hit["id"] for hit in hits] == ["doc_chunk1", "doc_chunk3"]
+    assert index.search([1.0, 0.0, 0.0], filter_tags=["missing"]) == []
+    assert LocalVectorIndex.build([]).search([1.0, 0.0, 0.0]) == []
+
+    # Chunks stored without tags never match a tag filter
+    chunks[0].tags = None
+    untagged = LocalVectorIndex.build(chunks)
+    hits = untagged.search([1.0, 0.0, 0.0], filter_tags=["a"])
+    assert [hit["id"] for hit in hits] == ["doc_chunk2"]
+
+
+def test_client_uses_local_index(chunks):
+    """Test vector search is answered by the local index offline."""
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'):
+        client = AzureSearchClient(
+            None,
+            local_index=LocalVectorIndex.build(chunks)
+        )
+        results = list(client.vector_search([0.0, 1.0, 0.0], top=1))
+
+    assert [result.id for result in results] == ["doc_chunk2"]
+    assert results[0].tags == ["a"]
+    assert results[0].score == pytest.approx(1.0)
+
+    # Batched searches take the same offline route
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'):
+        batches = client.vector_search_many([[0, 1.0, 0], [1.0, 0, 0]])
+    assert [batch[0].id for batch in batches] == ["doc_chunk2", "doc_chunk0"]
+
+
+def test_client_wraps_local_index_errors(chunks):
+    """Test local index failures raise AzureSearchError like the service."""
+    index = LocalVectorIndex.build(chunks)
+    with patch('document_search.azure_ai_search.DefaultAzureCredential'), \
+            patch.object(index, "search", side_effect=ValueError("bad")):
+        client = AzureSearchClient(None, local_index=index)
+        with pytest.raises(AzureSearchError):
+            list(client.vector_search([1.0, 0.0, 0.0]))
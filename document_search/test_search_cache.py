@@ -0,0 +1,61 @@
+"""Tests for the search result caches."""
+
+import pytest
+from unittest.mock import patch
+from .search_cache import SemanticQueryCache, TTLCache
+
+
+def test_ttl_cache_expiry():
+    """Test entries expire after the TTL."""
+    cache = TTLCache(ttl=10)
+    with patch('document_search.search_cache.time.monotonic') as clock:
+        clock.return_value = 100.0
+        cache.set("query", ["result"])
+        clock.return_value = 105.0
+        assert cache.get("query") == ["result"]
+        clock.return_value = 111.0
+        assert cache.get("query") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_lru_eviction():
+    """Test the least recently used entry is evicted."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_semantic_cache_similar_query():
+    """Test near-identical vectors hit and dissimilar ones miss."""
+    cache = SemanticQueryCache(threshold=0.95)
+    cache.set([1.0, 0.0, 0.0], ("filter", 5), "results")
+
+    assert cache.get([0.99, 0.05, 0.0], ("filter", 5)) == "results"
+    assert cache.get([0.0, 1.0, 0.0], ("filter", 5)) is None
+    # Other query parameters must match exactly
+    assert cache.get([1.0, 0.0, 0.0], ("filter", 10)) is None
+    assert cache.get([0.0, 0.0, 0.0], ("filter", 5)) is None
+
+
+def test_semantic_cache_overwrites_oldest():
+    """Test the oldest entry is replaced when the cache is full."""
+    cache = SemanticQueryCache(maxsize=2)
+    cache.set([1.0, 0.0], None, "first")
+    cache.set([0.0, 1.0], None, "second")
+    cache.set([-1.0, 0.0], None, "third")
+    assert cache.get([1.0, 0.0], None) is None
+    assert cache.get([0.0, 1.0], None) == "second"
+    assert cache.get([-1.0, 0.0], None) == "third"
+
+
+def test_invalid_params():
+    """Test parameter validation."""
+    with pytest.raises(ValueError):
+        TTLCache(ttl=0)
+    with pytest.raises(ValueError):
+        SemanticQueryCache(threshold=0)
@@ -3,18 +3,36 @@ Main script for document processing and indexing pipeline.
 Handles document upload, processing, and search index updates.
 """
 
-import os
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Optional
+from itertools import islice
+from typing import (
+    Any,
+    Awaitable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple
+)
 from dataclasses import dataclass
-from dotenv import load_dotenv
 
+from config import get_env, get_env_flag
 from upload_service.blob_uploader import upload_to_blob
-from document_processor.chunker import TextChunker
-from document_processor.embedder import Embedder
-from document_search.azure_uploader import upload_to_azure, delete_all_files
-from models.document import DocumentChunk
+from document_processor.chunker import TextChunker, open_text_blocks
+from document_processor.embedder import (
+    EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    Embedder
+)
+from document_processor.embedding_cache import SQLiteEmbeddingCache
+from document_search.azure_uploader import (
+    upload_many_to_azure,
+    delete_all_files
+)
+from document_search.local_index import LocalVectorIndex
+from models.embedding_document import EmbeddingDocumentChunk
 
 
 @dataclass
@@ -25,38 +43,84 @@ class PipelineConfig:
     connection_string: str
     chunk_size: int = 1024
     chunk_overlap: int = 50
+    # Requires an int8 (Collection(Edm.SByte)) vector field
+    quantize_embeddings: bool = False
+    # SQLite file for embeddings reused across runs; in-memory if unset
+    embedding_cache_path: Optional[str] = None
+    # Directory of a local vector index rebuilt on ingest, for offline
+    # searches; not built if unset
+    local_index_path: Optional[str] = None
 
     @classmethod
     def from_env(cls) -> 'PipelineConfig':
         """Load configuration from environment variables."""
-        load_dotenv(override=False)
-        
         required_vars = [
             "AZURE_SEARCH_ENDPOINT",
             "AZURE_BLOB_CONTAINER_NAME",
             "AZURE_BLOB_CONNECTION_STRING"
         ]
         
-        missing = [var for var in required_vars if not os.getenv(var)]
+        missing = [var for var in required_vars if not get_env(var)]
         if missing:
             missing_vars = ', '.join(missing)
             raise ValueError(f"Missing environment variables: {missing_vars}")
             
         return cls(
-            search_endpoint=os.getenv("AZURE_SEARCH_ENDPOINT"),
-            container_name=os.getenv("AZURE_BLOB_CONTAINER_NAME"),
-            connection_string=os.getenv("AZURE_BLOB_CONNECTION_STRING")
+            search_endpoint=get_env("AZURE_SEARCH_ENDPOINT"),
+            container_name=get_env("AZURE_BLOB_CONTAINER_NAME"),
+            connection_string=get_env("AZURE_BLOB_CONNECTION_STRING"),
+            quantize_embeddings=get_env_flag("AZURE_SEARCH_INT8_EMBEDDINGS"),
+            embedding_cache_path=get_env("EMBEDDING_CACHE_PATH"),
+            local_index_path=get_env("AZURE_SEARCH_LOCAL_INDEX")
         )
 
 
+async def _gather_or_cancel(*aws: Awaitable[Any]) -> List[Any]:
+    """
+    Run awaitables concurrently like asyncio.gather, but on the first
+    failure cancel the others and wait for them before raising.
+
+    asyncio.gather leaves the others running after one fails, so they
+    could still be using a resource the caller is about to close.
+
+    Returns:
+        The results, in argument order
+
+    Raises:
+        The first exception raised by an awaitable
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+    # Retrieve every exception so none is logged as never retrieved
+    errors = [task.exception() for task in tasks if not task.cancelled()]
+    error = next((e for e in errors if e is not None), None)
+    if error is not None:
+        raise error
+    return [task.result() for task in tasks]
+
+
 class DocumentProcessor:
     """Handles the document processing pipeline."""
+
+    # Chunks embedded per pipeline group, enough to keep every concurrent
+    # embeddings request busy, and groups buffered for upload
+    PIPELINE_GROUP_SIZE = EMBED_BATCH_SIZE * EMBED_CONCURRENCY
+    PIPELINE_QUEUE_SIZE = 8
     
     def __init__(self, config: PipelineConfig):
         """Initialize with configuration."""
         self.config = config
         self.chunker = TextChunker()
-        self.embedder = Embedder()
+        cache = (
+            SQLiteEmbeddingCache(config.embedding_cache_path)
+            if config.embedding_cache_path else None
+        )
+        self.embedder = Embedder(cache=cache)
         
         # Set up logging
         logging.basicConfig(
@@ -65,6 +129,171 @@ class DocumentProcessor:
         )
         self.logger = logging.getLogger(__name__)
 
+    async def _embed_and_upload(
+        self,
+        chunks: Iterable[str],
+        document_id: str,
+        tags: List[str]
+    ) -> int:
+        """
+        Embed chunks and upload them to the search index as a pipeline.
+
+        Chunks are embedded in groups and handed to the uploader through
+        a bounded queue, so each group is uploaded while the next one is
+        embedded. Uploads replace documents with the same key; the other
+        old documents are deleted only after every chunk is uploaded. If
+        embedding or uploading fails part way, the index keeps the old
+        documents, with the chunks uploaded so far replacing theirs.
+
+        Args:
+            chunks: Text chunks of the document; consumed lazily, so a
+                generator keeps only the groups in flight in memory
+            document_id: Unique identifier for the document
+            tags: Tags for the document
+
+        Returns:
+            int: Number of chunks uploaded
+        """
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=self.PIPELINE_QUEUE_SIZE
+        )
+        group_size = self.PIPELINE_GROUP_SIZE
+        # Chunks kept for the local index, when one is configured
+        indexed: List[EmbeddingDocumentChunk] = []
+        # Keys of the uploaded chunks, left in place when pruning
+        uploaded_ids: Set[str] = set()
+
+        async def embed_worker() -> None:
+            source = iter(chunks)
+            start = 0
+
+            def next_group() -> List[str]:
+                return list(islice(source, group_size))
+
+            async def produce_group() -> List[str]:
+                # Chunking is CPU-bound (reading, tokenizing, decoding);
+                # run it in a worker thread so the blob upload and the
+                # uploader keep running on the event loop meanwhile
+                producing = asyncio.ensure_future(
+                    asyncio.to_thread(next_group)
+                )
+                try:
+                    return await asyncio.shield(producing)
+                except asyncio.CancelledError:
+                    # The thread can't be interrupted; wait until it is
+                    # done with the chunks, which read the mapped file
+                    # the caller closes next
+                    await asyncio.wait([producing])
+                    raise
+
+            # One client for every group, so its connections are reused
+            async with self.embedder.async_client() as client:
+                while group := await produce_group():
+                    embeddings = await self.embedder.aembed_chunks(
+                        group, client=client
+                    )
+                    await queue.put([
+                        EmbeddingDocumentChunk.create_chunk(
+                            document_id=document_id,
+                            chunk_index=index,
+                            content=chunk,
+                            tags=tags,
+                            embeddings=embedding
+                        )
+                        for index, (chunk, embedding)
+                        in enumerate(zip(group, embeddings), start + 1)
+                    ])
+                    start += len(group)
+            # End of input; on failure the exception stops the pipeline
+            await queue.put(None)
+
+        async def upload_worker() -> int:
+            uploaded = 0
+            while (documents := await queue.get()) is not None:
+                if self.config.local_index_path:
+                    indexed.extend(documents)
+                # The SDK client is synchronous; upload off the event loop
+                uploaded += await asyncio.to_thread(
+                    upload_many_to_azure,
+                    documents,
+                    self.config.search_endpoint,
+                    self.config.quantize_embeddings
+                )
+                uploaded_ids.update(document.id for document in documents)
+            return uploaded
+
+        try:
+            _, uploaded = await _gather_or_cancel(
+                embed_worker(), upload_worker()
+            )
+        except Exception:
+            if uploaded_ids:
+                self.logger.warning(
+                    "Indexing stopped after %d chunks were uploaded; the "
+                    "index holds them alongside the previous documents",
+                    len(uploaded_ids)
+                )
+            raise
+
+        self.logger.info("Removing stale documents from the search index...")
+        await asyncio.to_thread(
+            delete_all_files, self.config.search_endpoint, uploaded_ids
+        )
+        if self.config.local_index_path:
+            await asyncio.to_thread(self._save_local_index, indexed)
+        return uploaded
+
+    def _save_local_index(
+        self,
+        documents: List[EmbeddingDocumentChunk]
+    ) -> None:
+        """Rebuild the local vector index from the uploaded chunks."""
+        self.logger.info("Saving local vector index...")
+        LocalVectorIndex.build(documents).save(self.config.local_index_path)
+
+    async def _run_pipeline(
+        self,
+        file_path: Path,
+        document_id: str,
+        tags: List[str]
+    ) -> Tuple[str, int]:
+        """
+        Run the blob upload and the indexing pipeline concurrently.
+
+        The blob upload does not depend on the chunks, so it runs in a
+        worker thread alongside chunking, embedding and indexing. The
+        document is streamed through the chunker; each group's upload
+        overlaps the next group's embedding, and the file is never read
+        into memory whole.
+
+        Args:
+            file_path: Path to the document
+            document_id: Unique identifier for the document
+            tags: Tags for the document
+
+        Returns:
+            Tuple of the blob URL and the number of chunks uploaded
+        """
+        blob_upload = asyncio.to_thread(
+            upload_to_blob,
+            file_path=file_path,
+            container_name=self.config.container_name,
+            connection_string=self.config.connection_string
+        )
+        with open_text_blocks(file_path) as blocks:
+            chunks = self.chunker.iter_chunk_with_overlap(
+                blocks,
+                max_tokens=self.config.chunk_size,
+                overlap=self.config.chunk_overlap
+            )
+            # Waits for the indexing pipeline to stop, even on failure,
+            # before the mapped file is closed
+            blob_url, uploaded = await _gather_or_cancel(
+                blob_upload,
+                self._embed_and_upload(chunks, document_id, tags)
+            )
+        return blob_url, uploaded
+
     def process_document(
         self,
         file_path: str | Path,
@@ -93,51 +322,14 @@ class DocumentProcessor:
         tags = tags or ["technical section"]
         
         try:
-            # Step 1: Upload to blob storage
-            self.logger.info("Uploading document to blob storage...")
-            blob_url = upload_to_blob(
-                file_path=file_path,
-                container_name=self.config.container_name,
-                connection_string=self.config.connection_string
+            # Steps 1-5: Upload to blob storage while the document is
+            # chunked, embedded and indexed
+            self.logger.info("Uploading and processing document...")
+            blob_url, uploaded = asyncio.run(
+                self._run_pipeline(file_path, document_id, tags)
             )
             self.logger.info(f"Document uploaded to blob: {blob_url}")
-
-            # Step 2: Read and chunk document
-            self.logger.info("Processing document...")
-            text = file_path.read_text(encoding='utf-8')
-            chunks = self.chunker.chunk_with_overlap(
-                text=text,
-                max_tokens=self.config.chunk_size,
-                overlap=self.config.chunk_overlap
-            )
-            self.logger.info(f"Generated {len(chunks)} chunks")
-
-            # Step 3: Generate embeddings
-            self.logger.info("Generating embeddings...")
-            embeddings = self.embedder.embed_chunks(chunks)
-            self.logger.info("Embeddings generated")
-
-            # Step 4: Clear existing documents
-            self.logger.info("Clearing existing search index...")
-            delete_all_files(
-                self.config.search_endpoint
-            )
-
-            # Step 5: Upload to search index
-            self.logger.info("Uploading to search index...")
-            chunk_pairs = enumerate(zip(chunks, embeddings), 1)
-            for index, (chunk, embedding) in chunk_pairs:
-                doc_chunk = DocumentChunk.create_chunk(
-                    document_id=document_id,
-                    chunk_index=index,
-                    content=chunk,
-                    tags=tags,
-                    embeddings=embedding
-                )
-                upload_to_azure(
-                    document=doc_chunk,
-                    search_endpoint=self.config.search_endpoint
-                )
+            self.logger.info(f"Uploaded {uploaded} chunks")
             
             self.logger.info("Document processing complete")
 
@@ -1,13 +1,81 @@
 
-import psycopg2
+"""
+PostgreSQL storage for document metadata.
+Connections come from a pool shared per set of connection parameters, so
+storing metadata for many documents does not reconnect for each one.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Sequence, Tuple
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 16
+
+_INSERT_DOCUMENTS = (
+    "INSERT INTO documents (doc_id, filename, upload_time) VALUES %s"
+)
+
+# Pools are kept until close_pools; evicting one without closing it
+# would leak its open connections
+_pools: Dict[Tuple[Tuple[str, Any], ...], ThreadedConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(params: Tuple[Tuple[str, Any], ...]) -> ThreadedConnectionPool:
+    """Get the connection pool for a set of connection parameters."""
+    with _pools_lock:
+        pool = _pools.get(params)
+        if pool is None:
+            pool = ThreadedConnectionPool(
+                POOL_MIN_CONNECTIONS,
+                POOL_MAX_CONNECTIONS,
+                **dict(params)
+            )
+            _pools[params] = pool
+        return pool
+
+
+def close_pools() -> None:
+    """Close every pooled connection, e.g. at process shutdown."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
+
+
+def store_metadata_batch(
+    rows: Iterable[Sequence[Any]],
+    connection_params: Dict[str, Any]
+) -> None:
+    """
+    Store metadata for several documents in one multi-row INSERT.
+
+    Args:
+        rows: (doc_id, filename, upload_time) rows
+        connection_params: psycopg2 connection parameters
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    pool = _get_pool(tuple(sorted(connection_params.items())))
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, _INSERT_DOCUMENTS, rows)
+        conn.commit()
+    except Exception:
+        # Never hand a connection with an open transaction back to the pool
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
 
 def store_metadata(doc_id, filename, upload_time, connection_params):
-    conn = psycopg2.connect(**connection_params)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO documents (doc_id, filename, upload_time)
-        VALUES (%s, %s, %s)
-    """, (doc_id, filename, upload_time))
-    conn.commit()
-    cur.close()
-    conn.close()
+    """Store metadata for a single document."""
+    store_metadata_batch([(doc_id, filename, upload_time)], connection_params)
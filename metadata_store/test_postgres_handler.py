@@ -0,0 +1,80 @@
+"""Tests for PostgreSQL metadata storage."""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+pytest.importorskip("psycopg2")
+
+from . import postgres_handler
+from .postgres_handler import store_metadata, store_metadata_batch
+
+
+PARAMS = {"dbname": "docs", "host": "localhost"}
+
+
+@pytest.fixture
+def mock_pool():
+    """Patch the pool lookup to hand out a single mocked connection."""
+    pool = MagicMock()
+    conn = pool.getconn.return_value
+    with patch.object(
+        postgres_handler, "_get_pool", return_value=pool
+    ) as get_pool:
+        yield get_pool, pool, conn
+
+
+def test_store_metadata_batch_commits(mock_pool):
+    """Test that all rows go to one execute_values call and are committed."""
+    get_pool, pool, conn = mock_pool
+    rows = [("doc-1", "a.txt", "2024-01-01"), ("doc-2", "b.txt", "2024-01-02")]
+
+    with patch.object(postgres_handler, "execute_values") as execute_values:
+        store_metadata_batch(iter(rows), PARAMS)
+
+    get_pool.assert_called_once_with(tuple(sorted(PARAMS.items())))
+    cursor = conn.cursor.return_value.__enter__.return_value
+    execute_values.assert_called_once_with(
+        cursor, postgres_handler._INSERT_DOCUMENTS, rows
+    )
+    conn.commit.assert_called_once()
+    conn.rollback.assert_not_called()
+    pool.putconn.assert_called_once_with(conn)
+
+
+def test_store_metadata_batch_rolls_back(mock_pool):
+    """Test that any failure rolls back and still returns the connection."""
+    _, pool, conn = mock_pool
+
+    with patch.object(
+        postgres_handler, "execute_values", side_effect=ValueError("bad row")
+    ):
+        with pytest.raises(ValueError):
+            store_metadata("doc-1", "a.txt", "2024-01-01", PARAMS)
+
+    conn.commit.assert_not_called()
+    conn.rollback.assert_called_once()
+    pool.putconn.assert_called_once_with(conn)
+
+
+def test_store_metadata_batch_skips_empty(mock_pool):
+    """Test that no connection is taken for an empty batch."""
+    get_pool, _, _ = mock_pool
+
+    store_metadata_batch([], PARAMS)
+
+    get_pool.assert_not_called()
+
+
+def test_close_pools_closes_every_pool():
+    """Test that pools are shared per parameters and closed on shutdown."""
+    with patch.object(postgres_handler, "ThreadedConnectionPool") as pool_cls:
+        pool_cls.side_effect = lambda *args, **kwargs: MagicMock()
+        first = postgres_handler._get_pool((("dbname", "a"),))
+        assert postgres_handler._get_pool((("dbname", "a"),)) is first
+        second = postgres_handler._get_pool((("dbname", "b"),))
+
+        postgres_handler.close_pools()
+
+    first.closeall.assert_called_once()
+    second.closeall.assert_called_once()
+    assert not postgres_handler._pools
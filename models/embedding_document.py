@@ -1,14 +1,56 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence, Tuple, Union
+import numpy as np
+import orjson
 
 
-@dataclass
+def embedding_to_list(embeddings: np.ndarray) -> List[float]:
+    """
+    Convert a float32 embedding to a list of floats for JSON payloads.
+
+    Goes through orjson so each value keeps its shortest float32 form
+    (e.g. 0.1 rather than 0.10000000149011612), keeping upload payloads
+    compact.
+    """
+    return orjson.loads(
+        orjson.dumps(embeddings, option=orjson.OPT_SERIALIZE_NUMPY)
+    )
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Quantize an embedding to int8 with a symmetric per-vector scale.
+
+    The codes approximate embeddings / scale, so embeddings can be
+    recovered as codes * scale. Cosine similarity ignores the scale, so
+    an index comparing vectors by cosine can store the codes alone.
+
+    Returns:
+        Tuple of the int8 codes and the scale
+    """
+    peak = float(np.max(np.abs(embeddings))) if embeddings.size else 0.0
+    if peak == 0.0:
+        return np.zeros(embeddings.shape, dtype=np.int8), 1.0
+    scale = peak / 127
+    return np.round(embeddings / scale).astype(np.int8), scale
+
+
+@dataclass(slots=True)
 class EmbeddingDocumentChunk:
     id: str
     document_id: str
     content: str
     tags: List[str]
-    embeddings: List[float]
+    embeddings: np.ndarray
+
+    def __post_init__(self):
+        # Hold vectors as packed float32 rather than lists of Python floats
+        self.embeddings = np.asarray(self.embeddings, dtype=np.float32)
+
+    @property
+    def embeddings_int8(self) -> Tuple[np.ndarray, float]:
+        """The embeddings quantized to int8, with their scale."""
+        return quantize_int8(self.embeddings)
 
     def to_azure_document(self) -> dict:
         """Convert the document chunk to Azure Search format."""
@@ -17,7 +59,7 @@ class EmbeddingDocumentChunk:
             "documentid": self.document_id,
             "content": self.content,
             "tags": self.tags,
-            "embeddings": self.embeddings
+            "embeddings": embedding_to_list(self.embeddings)
         }
 
     @classmethod
@@ -27,7 +69,7 @@ class EmbeddingDocumentChunk:
         chunk_index: int,
         content: str,
         tags: List[str],
-        embeddings: List[float]
+        embeddings: Union[Sequence[float], np.ndarray]
     ) -> 'EmbeddingDocumentChunk':
         """Create a document chunk with the standard ID format."""
         chunk_id = f"{document_id}_chunk{chunk_index}"
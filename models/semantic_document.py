@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import List
 
 
-@dataclass
+@dataclass(slots=True)
 class SemanticDocumentChunk:
     id: str
     document_id: str
@@ -10,13 +10,16 @@ class SemanticDocumentChunk:
     tags: List[str]
 
     def to_azure_document(self) -> dict:
-        """Convert the document chunk to Azure Search format."""
+        """
+        Convert the document chunk to Azure Search format.
+
+        The semantic index ranks on text, so chunks carry no embeddings.
+        """
         return {
             "id": self.id,
             "documentid": self.document_id,
             "content": self.content,
-            "tags": self.tags,
-            "embeddings": self.embeddings
+            "tags": self.tags
         }
 
     @classmethod
@@ -0,0 +1,43 @@
+"""Tests for the embedding document model."""
+
+import numpy as np
+from .embedding_document import EmbeddingDocumentChunk, quantize_int8
+from .semantic_document import SemanticDocumentChunk
+
+
+def test_create_chunk_stores_float32():
+    """Test embeddings are held as a float32 array."""
+    chunk = EmbeddingDocumentChunk.create_chunk(
+        document_id="doc",
+        chunk_index=1,
+        content="text",
+        tags=[],
+        embeddings=[0.1, 0.2]
+    )
+    assert chunk.id == "doc_chunk1"
+    assert chunk.embeddings.dtype == np.float32
+    assert chunk.to_azure_document()["embeddings"] == [0.1, 0.2]
+
+
+def test_quantize_int8():
+    """Test int8 codes reconstruct the embedding within one step."""
+    embeddings = np.array([0.5, -0.25, 0.0, 0.1], dtype=np.float32)
+    codes, scale = quantize_int8(embeddings)
+    assert codes.dtype == np.int8
+    assert codes.tolist()[:3] == [127, -64, 0]
+    assert np.allclose(codes * scale, embeddings, atol=scale)
+
+    codes, scale = quantize_int8(np.zeros(3, dtype=np.float32))
+    assert codes.tolist() == [0, 0, 0]
+
+
+def test_semantic_chunk_to_azure_document():
+    """Test semantic chunks convert without embeddings and use slots."""
+    chunk = SemanticDocumentChunk.create_chunk("doc", 2, "text", ["t"])
+    assert chunk.to_azure_document() == {
+        "id": "doc_chunk2",
+        "documentid": "doc",
+        "content": "text",
+        "tags": ["t"]
+    }
+    assert not hasattr(chunk, "__dict__")
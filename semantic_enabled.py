@@ -3,18 +3,21 @@ Main script for document processing and indexing pipeline.
 Handles document upload, processing, and search index updates.
 """
 
-import os
 import logging
 from pathlib import Path
 import argparse
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from dotenv import load_dotenv
 
+from config import get_env
 from upload_service.blob_uploader import upload_to_blob
-from document_processor.chunker import TextChunker
+from document_processor.chunker import TextChunker, open_text_blocks
 from document_processor.embedder import Embedder
-from document_search.semantic_uploader import upload_to_azure, delete_all_files
+from document_search.semantic_uploader import (
+    upload_many_to_azure,
+    delete_all_files
+)
 from models.semantic_document import SemanticDocumentChunk
 
 
@@ -30,23 +33,21 @@ class PipelineConfig:
     @classmethod
     def from_env(cls) -> 'PipelineConfig':
         """Load configuration from environment variables."""
-        load_dotenv(override=False)
-        
         required_vars = [
             "AZURE_SEARCH_ENDPOINT",
             "AZURE_BLOB_CONTAINER_NAME",
             "AZURE_BLOB_CONNECTION_STRING"
         ]
         
-        missing = [var for var in required_vars if not os.getenv(var)]
+        missing = [var for var in required_vars if not get_env(var)]
         if missing:
             missing_vars = ', '.join(missing)
             raise ValueError(f"Missing environment variables: {missing_vars}")
             
         return cls(
-            search_endpoint=os.getenv("AZURE_SEARCH_ENDPOINT"),
-            container_name=os.getenv("AZURE_BLOB_CONTAINER_NAME"),
-            connection_string=os.getenv("AZURE_BLOB_CONNECTION_STRING")
+            search_endpoint=get_env("AZURE_SEARCH_ENDPOINT"),
+            container_name=get_env("AZURE_BLOB_CONTAINER_NAME"),
+            connection_string=get_env("AZURE_BLOB_CONNECTION_STRING")
         )
 
 
@@ -92,44 +93,57 @@ class DocumentProcessor:
             raise ValueError("document_id is required")
             
         try:
-            # Step 1: Upload to blob storage
+            # Step 1: Upload to blob storage in the background; nothing
+            # below depends on it, so it overlaps chunking and indexing
             self.logger.info("Uploading document to blob storage...")
-            blob_url = upload_to_blob(
+            blob_executor = ThreadPoolExecutor(max_workers=1)
+            blob_upload = blob_executor.submit(
+                upload_to_blob,
                 file_path=file_path,
                 container_name=self.config.container_name,
                 connection_string=self.config.connection_string
             )
-            self.logger.info(f"Document uploaded to blob: {blob_url}")
-
-            # Step 2: Read and chunk document
-            self.logger.info("Processing document...")
-            text = file_path.read_text(encoding='utf-8')
-            chunks = self.chunker.chunk_with_overlap(
-                text=text,
-                max_tokens=self.config.chunk_size,
-                overlap=self.config.chunk_overlap
-            )
-            self.logger.info(f"Generated {len(chunks)} chunks")
-
-            # Step 3: Clear existing documents
-            self.logger.info("Clearing existing search index...")
-            delete_all_files(
-                self.config.search_endpoint
-            )
-
-            # Step 4: Upload to search index
-            self.logger.info("Uploading to search index...")
-            for index in range(len(chunks)):
-                doc_chunk = SemanticDocumentChunk.create_chunk(
-                    document_id=document_id,
-                    chunk_index=index,
-                    content=chunks[index],
-                    tags=tags,
+            blob_executor.shutdown(wait=False)
+
+            # Steps 2-3: Chunk the document as it is read and upload the
+            # chunks in batches as they are produced, so neither the text
+            # nor the full chunk list is held in memory. Documents with
+            # the same key are replaced.
+            self.logger.info("Processing and uploading document...")
+            uploaded_ids: Set[str] = set()
+
+            def documents(
+                chunks: Iterable[str]
+            ) -> Iterator[SemanticDocumentChunk]:
+                for index, chunk in enumerate(chunks):
+                    document = SemanticDocumentChunk.create_chunk(
+                        document_id=document_id,
+                        chunk_index=index,
+                        content=chunk,
+                        tags=tags,
+                    )
+                    uploaded_ids.add(document.id)
+                    yield document
+
+            with open_text_blocks(file_path) as blocks:
+                chunks = self.chunker.iter_chunk_with_overlap(
+                    blocks,
+                    max_tokens=self.config.chunk_size,
+                    overlap=self.config.chunk_overlap
                 )
-                upload_to_azure(
-                    document=doc_chunk,
+                uploaded = upload_many_to_azure(
+                    documents=documents(chunks),
                     search_endpoint=self.config.search_endpoint
                 )
+            self.logger.info(f"Uploaded {uploaded} chunks")
+
+            # Step 4: Remove the documents this upload did not replace;
+            # skipped if anything above failed, keeping the old ones
+            self.logger.info("Removing stale search documents...")
+            delete_all_files(self.config.search_endpoint, uploaded_ids)
+
+            blob_url = blob_upload.result()
+            self.logger.info(f"Document uploaded to blob: {blob_url}")
             
             self.logger.info("Document processing complete")
 
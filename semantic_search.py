@@ -3,10 +3,17 @@
 Semantic search interface for Azure AI Search.
 """
 
-import os
+import sys
 import argparse
-from document_search.azure_ai_search import AzureSearchClient
-from dotenv import load_dotenv
+from config import get_env
+from document_search.azure_ai_search import (
+    close_search_clients,
+    get_search_client
+)
+
+
+# Characters of content shown per result
+CONTENT_PREVIEW_CHARS = 200
 
 
 def semantic_search_documents(
@@ -17,23 +24,21 @@ def semantic_search_documents(
     """
     Search documents and display results.
     """
-    load_dotenv(override=False)
-    
-    search_endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
+    search_endpoint = get_env("AZURE_SEARCH_ENDPOINT")
     
     if not search_endpoint:
         print("Error: Missing Azure Search configuration")
         return
     
     # Use provided tags (list) or default to None (no tag filter)
-    client = AzureSearchClient(search_endpoint)
     try:
-
-        results = client.semantic_search(
+        # Shared client: connections and cached results are reused
+        client = get_search_client(search_endpoint)
+        results = list(client.semantic_search(
             search_text=search_text,
             filter_tags=document_tags,
             top=max_results,
-        )
+        ))
         
         if not results:
             print("No matching documents found.")
@@ -49,18 +54,28 @@ def semantic_search_documents(
 
 
 def display_information(results):
+    """
+    Display search results with formatted output.
+
+    The whole listing is built first and written to stdout in one call.
+    """
+    lines = []
     for i, result in enumerate(results, 1):
-        print(f"Result {i}:")
-        print(f"ID: {result.id}")
-        print(f"Document ID: {result.document_id}")
-        print(f"Score: {result.score:.2f}")
         content = (
-                result.content[:200] + "..."
-                if len(result.content) > 100
-                else result.content
-            )
-        print(f"Content: {content}")
-        print("-" * 60)
+            result.content[:CONTENT_PREVIEW_CHARS] + "..."
+            if len(result.content) > CONTENT_PREVIEW_CHARS
+            else result.content
+        )
+        lines.extend((
+            f"Result {i}:",
+            f"ID: {result.id}",
+            f"Document ID: {result.document_id}",
+            f"Score: {result.score:.2f}",
+            f"Content: {content}",
+            "-" * 60
+        ))
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -96,7 +111,10 @@ def main():
     )
 
     print("Semantic Search Results:")
-    semantic_search_documents(args.query, args.num_results, document_tags)
+    try:
+        semantic_search_documents(args.query, args.num_results, document_tags)
+    finally:
+        close_search_clients()
 
 
 if __name__ == "__main__":
@@ -1,15 +1,115 @@
 
+import base64
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-from azure.storage.blob import BlobServiceClient, BlobClient
+from typing import BinaryIO, List, Optional
+from azure.storage.blob import (
+    BlobBlock,
+    BlobClient,
+    BlobServiceClient,
+    ContainerClient,
+    ContentSettings
+)
 from azure.core.exceptions import AzureError
 
 
+# Files larger than one block are uploaded as blocks staged in parallel
+BLOCK_SIZE = 4 * 1024 * 1024
+MAX_CONCURRENCY = 8
+
+
 class BlobUploadError(Exception):
     """Custom exception for Azure Blob Storage operations."""
     pass
 
 
+@lru_cache(maxsize=4)
+def _get_service_client(connection_string: str) -> BlobServiceClient:
+    """
+    Get the blob service client for a connection string.
+
+    Cached so repeated uploads reuse the parsed connection string and the
+    client's pooled connections instead of opening new ones per file.
+    """
+    print("Creating Azure Blob Storage connection...")
+    return BlobServiceClient.from_connection_string(connection_string)
+
+
+@lru_cache(maxsize=16)
+def _get_container_client(
+    connection_string: str,
+    container_name: str
+) -> ContainerClient:
+    """
+    Get a client for a container, creating the container on first use.
+
+    Cached so the create-container request is sent once per process.
+    """
+    service_client = _get_service_client(connection_string)
+    try:
+        service_client.create_container(container_name)
+        print(f"Created new container: {container_name}")
+    except Exception:
+        # Container already exists
+        print(f"Using existing container: {container_name}")
+    return service_client.get_container_client(container_name)
+
+
+def _block_id(index: int) -> str:
+    """Build the block ID for a block index; all IDs have equal length."""
+    return base64.b64encode(f"{index:08d}".encode("ascii")).decode("ascii")
+
+
+def _upload_blocks(
+    blob_client: BlobClient,
+    data: BinaryIO,
+    content_type: Optional[str] = None,
+    block_size: int = BLOCK_SIZE,
+    max_concurrency: int = MAX_CONCURRENCY
+) -> int:
+    """
+    Upload a stream as blocks staged in parallel, then commit them.
+
+    At most max_concurrency blocks are read ahead of the ones already
+    staged, so memory stays bounded for large files.
+
+    Args:
+        blob_client: Client for the target blob
+        data: Binary stream to upload
+        content_type: Optional MIME type of the blob
+        block_size: Bytes per staged block
+        max_concurrency: Maximum number of blocks staged at once
+
+    Returns:
+        int: Number of blocks committed
+    """
+    block_ids: List[str] = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight = deque()
+        while True:
+            block = data.read(block_size)
+            if not block:
+                break
+            block_id = _block_id(len(block_ids))
+            block_ids.append(block_id)
+            in_flight.append(
+                executor.submit(blob_client.stage_block, block_id, block)
+            )
+            if len(in_flight) >= max_concurrency:
+                in_flight.popleft().result()
+        for future in in_flight:
+            future.result()
+
+    # Committing replaces any existing blob with the staged blocks, in order
+    blob_client.commit_block_list(
+        [BlobBlock(block_id=block_id) for block_id in block_ids],
+        content_settings=ContentSettings(content_type=content_type)
+    )
+    return len(block_ids)
+
+
 def upload_to_blob(
     file_path: str | Path,
     container_name: str,
@@ -38,35 +138,26 @@ def upload_to_blob(
         raise FileNotFoundError(f"File not found: {file_path}")
     
     try:
-        # Create blob service client
-        print("Creating Azure Blob Storage connection...")
-        blob_service_client = BlobServiceClient.from_connection_string(
-            connection_string
+        container_client = _get_container_client(
+            connection_string,
+            container_name
         )
         
-        # Ensure container exists
-        try:
-            blob_service_client.create_container(container_name)
-            print(f"Created new container: {container_name}")
-        except Exception:
-            # Container already exists
-            print(f"Using existing container: {container_name}")
-        
         # Get blob client
         blob_name = file_path.name
-        blob_client: BlobClient = blob_service_client.get_blob_client(
-            container=container_name,
-            blob=blob_name
-        )
+        blob_client: BlobClient = container_client.get_blob_client(blob_name)
         
         # Upload file
         print(f"Uploading file: {file_path}")
         with open(file_path, "rb") as data:
-            blob_client.upload_blob(
-                data,
-                overwrite=True,
-                content_type=content_type
-            )
+            if file_path.stat().st_size > BLOCK_SIZE:
+                _upload_blocks(blob_client, data, content_type)
+            else:
+                blob_client.upload_blob(
+                    data,
+                    overwrite=True,
+                    content_type=content_type
+                )
         
         blob_url = blob_client.url
         print(f"Successfully uploaded {blob_name} to {container_name}")
@@ -0,0 +1,25 @@
+"""Tests for Azure Blob Storage uploads."""
+
+import io
+from unittest.mock import MagicMock
+from .blob_uploader import _upload_blocks
+
+
+def test_upload_blocks_in_order():
+    """Test a stream is staged block by block and committed in order."""
+    blob_client = MagicMock()
+    data = io.BytesIO(b"abcdefghij")
+
+    assert _upload_blocks(
+        blob_client, data, block_size=4, max_concurrency=2
+    ) == 3
+
+    staged = sorted(
+        call.args for call in blob_client.stage_block.call_args_list
+    )
+    assert [block for _, block in staged] == [b"abcd", b"efgh", b"ij"]
+    committed = blob_client.commit_block_list.call_args.args[0]
+    assert [block.id for block in committed] == [
+        block_id for block_id, _ in staged
+    ]
+    assert len({len(block.id) for block in committed}) == 1
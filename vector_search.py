@@ -3,15 +3,23 @@
 Simple search interface for Azure AI Search.
 """
 
-import os
+import sys
 import argparse
-from document_search.azure_ai_search import AzureSearchClient
-from dotenv import load_dotenv
+import numpy as np
+from config import get_env, get_env_flag
+from document_search.azure_ai_search import (
+    close_search_clients,
+    get_search_client
+)
 from document_processor.embedder import Embedder
 
 
+# Characters of content shown per result
+CONTENT_PREVIEW_CHARS = 200
+
+
 def vector_search_documents(
-    embeddings: list,
+    embeddings: list | np.ndarray,
     max_results: int = 5,
     document_tags: list | None = None
 ) -> None:
@@ -19,25 +27,29 @@ def vector_search_documents(
     Search documents and display results.
 
     Args:
-        embeddings: Vector embeddings to search with
+        embeddings: Query vector, as a list or a float32 array
         max_results: Maximum number of results to return
         document_tags: Optional list of tags to filter by
     """
-    load_dotenv(override=False)
+    search_endpoint = get_env("AZURE_SEARCH_ENDPOINT")
+    # The local index built on ingest answers queries only when asked
+    # to, or when there is no service to query
+    local_index_path = get_env("AZURE_SEARCH_LOCAL_INDEX")
+    if search_endpoint and not get_env_flag("AZURE_SEARCH_LOCAL_QUERIES"):
+        local_index_path = None
     
-    search_endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
-    
-    if not search_endpoint:
+    if not search_endpoint and not local_index_path:
         print("Error: Missing Azure Search configuration")
         return
 
-    client = AzureSearchClient(search_endpoint)
     try:
-        results = client.vector_search(
+        # Shared client: connections and cached results are reused
+        client = get_search_client(search_endpoint, local_index_path)
+        results = list(client.vector_search(
             embeddings=embeddings,
             filter_tags=document_tags,
             top=max_results
-        )
+        ))
         
         if not results:
             print("No matching documents found.")
@@ -54,19 +66,29 @@ def vector_search_documents(
 
 
 def display_information(results):
-    """Display search results with formatted output."""
+    """
+    Display search results with formatted output.
+
+    The whole listing is built first and written to stdout in one call.
+    """
+    lines = []
     for i, result in enumerate(results, 1):
-        print(f"Result {i}:")
-        print(f"ID: {result.id}")
-        print(f"Document ID: {result.document_id}")
-        print(f"Score: {result.score:.2f}")
         content = (
-                result.content[:200] + "..."
-                if len(result.content) > 100
-                else result.content
-            )
-        print(f"Content: {content}")
-        print("-" * 60)
+            result.content[:CONTENT_PREVIEW_CHARS] + "..."
+            if len(result.content) > CONTENT_PREVIEW_CHARS
+            else result.content
+        )
+        lines.extend((
+            f"Result {i}:",
+            f"ID: {result.id}",
+            f"Document ID: {result.document_id}",
+            f"Score: {result.score:.2f}",
+            f"Content: {content}",
+            "-" * 60
+        ))
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+
 
 def main():
     """Main entry point."""
@@ -100,16 +122,20 @@ def main():
         if args.documentTags else None
     )
 
-    # Generate embeddings
+    # Generate the query vector as a float32 array; it is converted to
+    # a list only when the search request is built
     embedder = Embedder()
-    embeddings = embedder.embed_chunks([args.query])[0]
+    embeddings = embedder.embed_chunks_array([args.query])[0]
     # Search documents by sending embeddings
     print("Vector Search Results:")
-    vector_search_documents(
-        embeddings=embeddings,
-        max_results=args.num_results,
-        document_tags=document_tags
-    )
+    try:
+        vector_search_documents(
+            embeddings=embeddings,
+            max_results=args.num_results,
+            document_tags=document_tags
+        )
+    finally:
+        close_search_clients()
 
 
 if __name__ == "__main__":